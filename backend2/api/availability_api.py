@@ -9,13 +9,13 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, HTTPException, Depends, Query
 import logging
-from services.local_cache_service import LocalCacheService
+from services.local_cache_service import local_cache_service
 from services.availability_service import AvailabilityService
 from services.auth_service import require_api_key
 
 router = APIRouter(prefix="/api", tags=["availability"])
 
-cache_service = LocalCacheService()
+cache_service = local_cache_service
 availability_service = AvailabilityService()
 
 @router.get("/availability")
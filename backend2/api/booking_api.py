@@ -10,15 +10,12 @@ import logging
 from datetime import datetime, timedelta, date
 from typing import Dict, List, Optional, Any, Union
 from fastapi import APIRouter, HTTPException
-from dotenv import load_dotenv
 from pathlib import Path
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from services.patient_interaction_logger import patient_logger
-
-# Load environment variables
-load_dotenv()
+from config import KOLLA_BASE_URL, KOLLA_HEADERS as KOLLA_BASE_HEADERS
 
 # Import shared models
 from .models import BookAppointmentRequest, RescheduleRequest, ContactInfo
@@ -148,19 +145,8 @@ def get_hygienist_provider_for_appointment_date(appointment_date: str, hygienist
         logging.error(f"❌ Error determining hygienist provider for date {appointment_date}: {e}")
         return None
 
-# Load configuration from environment variables
-KOLLA_BASE_URL = os.getenv('KOLLA_BASE_URL', 'https://unify.kolla.dev/dental/v1')
-KOLLA_BEARER_TOKEN = os.getenv('KOLLA_BEARER_TOKEN', '')
-KOLLA_CONNECTOR_ID = os.getenv('KOLLA_CONNECTOR_ID', 'eaglesoft')
-KOLLA_CONSUMER_ID = os.getenv('KOLLA_CONSUMER_ID', 'dajc')
-
-KOLLA_HEADERS = {
-    'connector-id': KOLLA_CONNECTOR_ID,
-    'consumer-id': KOLLA_CONSUMER_ID,
-    'Content-Type': 'application/json',
-    'Accept': 'application/json',
-    'Authorization': f'Bearer {KOLLA_BEARER_TOKEN}'
-}
+# Shared Kolla headers plus Content-Type, since bodies here are sent pre-serialized via data=
+KOLLA_HEADERS = {**KOLLA_BASE_HEADERS, 'Content-Type': 'application/json'}
 
 KOLLA_RESOURCES_URL = f"{KOLLA_BASE_URL}/resources"
 
@@ -1,28 +1,16 @@
 import requests
-import os
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
-from dotenv import load_dotenv
+from config import KOLLA_BASE_URL, KOLLA_HEADERS
 from services.patient_interaction_logger import patient_logger
 from services.auth_service import require_api_key
+from api.models import ConfirmByPhoneRequest
 import logging
 
-# Load environment variables
-load_dotenv()
-
 router = APIRouter(prefix="/api", tags=["confirm"])
 
-# Kolla API configuration
-KOLLA_BASE_URL = os.getenv("KOLLA_BASE_URL", "https://unify.kolla.dev/dental/v1")
-KOLLA_HEADERS = {
-    "accept": "application/json",
-    "authorization": f"Bearer {os.getenv('KOLLA_BEARER_TOKEN')}",
-    "connector-id": os.getenv("KOLLA_CONNECTOR_ID", "eaglesoft"),
-    "consumer-id": os.getenv("KOLLA_CONSUMER_ID", "dajc")
-}
-
 logger = logging.getLogger(__name__)
 
 async def fetch_patient_details_by_contact_id(contact_id: str) -> Dict[str, Any]:
@@ -226,14 +214,6 @@ class ConfirmRequest(BaseModel):
     confirmation_type: Optional[str] = "confirmationTypes/1"  # Fixed: valid confirmation type based on Kolla docs
     notes: Optional[str] = None
 
-class ConfirmByPhoneRequest(BaseModel):
-    phone: str
-    name: Optional[str] = None
-    dob: Optional[str] = None  # Date of birth
-    confirmed: bool = True
-    confirmation_type: Optional[str] = "confirmationTypes/1"
-    notes: Optional[str] = None
-
 @router.post("/confirm_by_phone", status_code=200)
 async def confirm_by_phone(request: ConfirmByPhoneRequest, authenticated: bool = Depends(require_api_key)):
     """
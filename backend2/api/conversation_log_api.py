@@ -294,8 +294,9 @@ async def get_conversation_logs(patient_name: Optional[str] = None,
         filtered_logs = all_logs
         
         if patient_name:
+            target_name = patient_name.lower()
             filtered_logs = [log for log in filtered_logs 
-                           if log.get("patient_name", "").lower() == patient_name.lower()]
+                           if log.get("patient_name", "").lower() == target_name]
         
         if start_date:
             start_dt = datetime.fromisoformat(start_date)
@@ -9,6 +9,7 @@ from fastapi import APIRouter, HTTPException
 
 # Import dependencies (will be injected from main.py)
 from services.getkolla_service import GetKollaService
+from services.record_store import RecordStore
 
 router = APIRouter(prefix="/api", tags=["debug"])
 
@@ -85,18 +86,20 @@ async def get_debug_schedule(schedule: Dict, bookings: List):
         "total_existing_bookings": len(bookings)
     }
 
-async def get_debug_callbacks(callback_requests: List):
-    """Debug endpoint to view all callback requests"""
+async def get_debug_callbacks(callback_requests: RecordStore):
+    """Debug endpoint to view the most recent callback requests"""
+    callbacks = await callback_requests.recent()
     return {
-        "callbacks": callback_requests,
-        "total": len(callback_requests)
+        "callbacks": callbacks,
+        "total": len(callbacks)
     }
 
-async def get_debug_conversations(conversation_logs: List):
-    """Debug endpoint to view all conversation logs"""
+async def get_debug_conversations(conversation_logs: RecordStore):
+    """Debug endpoint to view the most recent conversation logs"""
+    conversations = await conversation_logs.recent()
     return {
-        "conversations": conversation_logs,
-        "total": len(conversation_logs)
+        "conversations": conversations,
+        "total": len(conversations)
     }
 
 async def get_debug_knowledge_base(knowledge_base: Dict):
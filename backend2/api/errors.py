@@ -0,0 +1,12 @@
+"""
+Shared HTTP error helpers for API routers
+"""
+
+from fastapi import HTTPException
+
+from config import DEBUG
+
+def http_error(status_code: int, message: str, exc: BaseException) -> HTTPException:
+    """Build an HTTPException, appending the exception text only in debug so production skips formatting it"""
+    detail = f"{message}: {exc}" if DEBUG else message
+    return HTTPException(status_code=status_code, detail=detail)
@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, HTTPException, Depends
 from services.auth_service import require_api_key
+from services.keyword_scanner import KeywordScanner
 from pathlib import Path
 import logging
 from api.models import AnswerFAQRequest
@@ -71,116 +72,150 @@ async def answer_faq_query(request: AnswerFAQRequest, authenticated: bool = Depe
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing FAQ query: {str(e)}")
 
-def search_knowledge_base(query: str, knowledge_base: Dict) -> tuple[Optional[str], Optional[str]]:
-    """Search knowledge base for relevant information"""
-    query_lower = query.lower()
-    clinic_info = knowledge_base.get("clinic_info", {})
-    
-    # Address/Location queries
-    if any(word in query_lower for word in ["address", "location", "where", "find", "directions"]):
-        address = clinic_info.get("address")
-        if address:
-            response = f"Our clinic is located at: {address}"
-            parking_info = clinic_info.get("parking_info")
-            if parking_info:
-                response += f"\n\nParking: {parking_info}"
-            return response, "clinic_address"
-    
-    # Parking queries
-    if any(word in query_lower for word in ["parking", "park"]):
+# Keyword routing in priority order: the first matched category that has data answers the query
+FAQ_KEYWORDS = (
+    ("clinic_address", ("address", "location", "where", "find", "directions")),
+    ("parking_info", ("parking", "park")),
+    ("office_hours", ("hours", "open", "closed", "time", "schedule", "when")),
+    ("services", ("service", "treatment", "procedure", "do you do", "offer")),
+    ("pricing", ("cost", "price", "fee", "how much", "payment")),
+    ("insurance", ("insurance", "coverage", "accept", "plan")),
+    ("staff_info", ("doctor", "dentist", "who", "staff", "team")),
+    ("contact_info", ("phone", "call", "contact", "number")),
+    ("emergency_info", ("emergency", "urgent", "after hours", "weekend")),
+    ("appointment_booking", ("appointment", "book", "schedule", "availability")),
+    ("new_patient_info", ("new patient", "first visit", "first time")),
+    ("payment_methods", ("payment", "credit card", "cash", "financing")),
+)
+
+_KEYWORD_SCANNER = KeywordScanner(FAQ_KEYWORDS)
+
+def _answer_clinic_address(clinic_info: Dict) -> Optional[str]:
+    address = clinic_info.get("address")
+    if address:
+        response = f"Our clinic is located at: {address}"
         parking_info = clinic_info.get("parking_info")
         if parking_info:
-            return parking_info, "parking_info"
-    
-    # Hours/Schedule queries
-    if any(word in query_lower for word in ["hours", "open", "closed", "time", "schedule", "when"]):
-        hours = clinic_info.get("office_hours_detailed", {})
-        if hours:
-            hours_text = "Our office hours are:\n" + "\n".join([f"{day}: {time}" for day, time in hours.items()])
-            return hours_text, "office_hours"
-    
-    # Services queries
-    if any(word in query_lower for word in ["service", "treatment", "procedure", "do you do", "offer"]):
-        services = clinic_info.get("services_offered_summary", [])
-        if services:
-            services_text = "We offer the following services:\n• " + "\n• ".join(services)
-            return services_text, "services"
-    
-    # Pricing queries
-    if any(word in query_lower for word in ["cost", "price", "fee", "how much", "payment"]):
-        pricing = clinic_info.get("service_pricing", {})
-        if pricing:
-            pricing_text = "Here are some of our prices:\n"
-            for service, price in pricing.items():
-                pricing_text += f"• {service}: {price}\n"
-            pricing_text += "\nPrices may vary based on individual needs. Please contact us for a personalized quote."
-            return pricing_text, "pricing"
-    
-    # Insurance queries
-    if any(word in query_lower for word in ["insurance", "coverage", "accept", "plan"]):
-        insurance_info = clinic_info.get("insurance_info", {})
-        accepted_plans = insurance_info.get("accepted_plans", [])
-        if accepted_plans:
-            insurance_text = "We accept the following insurance plans:\n• " + "\n• ".join(accepted_plans)
-            insurance_text += "\n\nPlease contact us to verify your specific coverage."
-            return insurance_text, "insurance"
-    
-    # Doctor/Staff queries
-    if any(word in query_lower for word in ["doctor", "dentist", "who", "staff", "team"]):
-        doctors = clinic_info.get("dentist_team", [])
-        if doctors:
-            doctor_info = "Our dental team includes:\n"
-            for doc in doctors:
-                name = doc.get("name", "Unknown")
-                speciality = doc.get("speciality", "General Dentistry")
-                doctor_info += f"• Dr. {name} - {speciality}\n"
-            return doctor_info, "staff_info"
-    
-    # Contact information queries
-    if any(word in query_lower for word in ["phone", "call", "contact", "number"]):
-        phone = clinic_info.get("phone")
-        email = clinic_info.get("email")
-        if phone or email:
-            contact_text = "You can contact us:\n"
-            if phone:
-                contact_text += f"Phone: {phone}\n"
-            if email:
-                contact_text += f"Email: {email}\n"
-            return contact_text, "contact_info"
-    
-    # Emergency queries
-    if any(word in query_lower for word in ["emergency", "urgent", "after hours", "weekend"]):
-        emergency_info = clinic_info.get("emergency_contact")
-        if emergency_info:
-            return emergency_info, "emergency_info"
-        else:
-            return "For dental emergencies, please call our main number. Emergency services may be available.", "emergency_info"
-    
-    # Appointment booking queries
-    if any(word in query_lower for word in ["appointment", "book", "schedule", "availability"]):
-        return "To book an appointment, please call us or use our online booking system. We'll help you find a convenient time.", "appointment_booking"
-    
-    # New patient queries
-    if any(word in query_lower for word in ["new patient", "first visit", "first time"]):
-        return "Welcome! New patients are always welcome. Please arrive 15 minutes early for your first visit to complete paperwork. We'll send you forms to fill out beforehand.", "new_patient_info"
+            response += f"\n\nParking: {parking_info}"
+        return response
+    return None
+
+def _answer_parking_info(clinic_info: Dict) -> Optional[str]:
+    return clinic_info.get("parking_info") or None
+
+def _answer_office_hours(clinic_info: Dict) -> Optional[str]:
+    hours = clinic_info.get("office_hours_detailed", {})
+    if hours:
+        return "Our office hours are:\n" + "\n".join([f"{day}: {time}" for day, time in hours.items()])
+    return None
+
+def _answer_services(clinic_info: Dict) -> Optional[str]:
+    services = clinic_info.get("services_offered_summary", [])
+    if services:
+        return "We offer the following services:\n• " + "\n• ".join(services)
+    return None
+
+def _answer_pricing(clinic_info: Dict) -> Optional[str]:
+    pricing = clinic_info.get("service_pricing", {})
+    if pricing:
+        pricing_text = "Here are some of our prices:\n"
+        for service, price in pricing.items():
+            pricing_text += f"• {service}: {price}\n"
+        pricing_text += "\nPrices may vary based on individual needs. Please contact us for a personalized quote."
+        return pricing_text
+    return None
+
+def _answer_insurance(clinic_info: Dict) -> Optional[str]:
+    insurance_info = clinic_info.get("insurance_info", {})
+    accepted_plans = insurance_info.get("accepted_plans", [])
+    if accepted_plans:
+        insurance_text = "We accept the following insurance plans:\n• " + "\n• ".join(accepted_plans)
+        insurance_text += "\n\nPlease contact us to verify your specific coverage."
+        return insurance_text
+    return None
+
+def _answer_staff_info(clinic_info: Dict) -> Optional[str]:
+    doctors = clinic_info.get("dentist_team", [])
+    if doctors:
+        doctor_info = "Our dental team includes:\n"
+        for doc in doctors:
+            name = doc.get("name", "Unknown")
+            speciality = doc.get("speciality", "General Dentistry")
+            doctor_info += f"• Dr. {name} - {speciality}\n"
+        return doctor_info
+    return None
+
+def _answer_contact_info(clinic_info: Dict) -> Optional[str]:
+    phone = clinic_info.get("phone")
+    email = clinic_info.get("email")
+    if phone or email:
+        contact_text = "You can contact us:\n"
+        if phone:
+            contact_text += f"Phone: {phone}\n"
+        if email:
+            contact_text += f"Email: {email}\n"
+        return contact_text
+    return None
+
+def _answer_emergency_info(clinic_info: Dict) -> Optional[str]:
+    return clinic_info.get("emergency_contact") or "For dental emergencies, please call our main number. Emergency services may be available."
+
+def _answer_appointment_booking(clinic_info: Dict) -> Optional[str]:
+    return "To book an appointment, please call us or use our online booking system. We'll help you find a convenient time."
+
+def _answer_new_patient_info(clinic_info: Dict) -> Optional[str]:
+    return "Welcome! New patients are always welcome. Please arrive 15 minutes early for your first visit to complete paperwork. We'll send you forms to fill out beforehand."
+
+def _answer_payment_methods(clinic_info: Dict) -> Optional[str]:
+    payment_info = clinic_info.get("payment_methods", [])
+    if payment_info:
+        return "We accept the following payment methods:\n• " + "\n• ".join(payment_info)
+    return None
+
+# Category -> answer builder; each returns None when the knowledge base has no data for it
+_ANSWER_BUILDERS = {
+    "clinic_address": _answer_clinic_address,
+    "parking_info": _answer_parking_info,
+    "office_hours": _answer_office_hours,
+    "services": _answer_services,
+    "pricing": _answer_pricing,
+    "insurance": _answer_insurance,
+    "staff_info": _answer_staff_info,
+    "contact_info": _answer_contact_info,
+    "emergency_info": _answer_emergency_info,
+    "appointment_booking": _answer_appointment_booking,
+    "new_patient_info": _answer_new_patient_info,
+    "payment_methods": _answer_payment_methods,
+}
+
+def search_knowledge_base(query: str, knowledge_base: Dict) -> tuple[Optional[str], Optional[str]]:
+    """Search knowledge base for relevant information"""
+    matched = _KEYWORD_SCANNER.match(query.lower())
+    if not matched:
+        return None, None
     
-    # Payment method queries
-    if any(word in query_lower for word in ["payment", "credit card", "cash", "financing"]):
-        payment_info = clinic_info.get("payment_methods", [])
-        if payment_info:
-            payment_text = "We accept the following payment methods:\n• " + "\n• ".join(payment_info)
-            return payment_text, "payment_methods"
+    clinic_info = knowledge_base.get("clinic_info", {})
+    for category, _ in FAQ_KEYWORDS:
+        if category in matched:
+            answer = _ANSWER_BUILDERS[category](clinic_info)
+            if answer:
+                return answer, category
     
     return None, None
 
+# Terms that boost confidence when they appear in both the query and the answer
+CONFIDENCE_KEY_TERMS = frozenset(("address", "hours", "price", "insurance", "doctor", "phone"))
+
 def calculate_confidence(query: str, answer: str) -> float:
     """Calculate confidence score for the answer"""
     if not answer:
         return 0.0
     
     # Simple confidence calculation based on query length and answer relevance
-    query_words = set(query.lower().split())
-    answer_words = set(answer.lower().split())
+    query_lower = query.lower()
+    answer_lower = answer.lower()
+    query_words = set(query_lower.split())
+    answer_words = set(answer_lower.split())
     
     # Count matching words
     matching_words = len(query_words.intersection(answer_words))
@@ -192,9 +227,8 @@ def calculate_confidence(query: str, answer: str) -> float:
     confidence = min(matching_words / total_query_words, 1.0)
     
     # Boost confidence for exact matches of key terms
-    key_terms = ["address", "hours", "price", "insurance", "doctor", "phone"]
-    for term in key_terms:
-        if term in query.lower() and term in answer.lower():
+    for term in CONFIDENCE_KEY_TERMS:
+        if term in query_lower and term in answer_lower:
             confidence = min(confidence + 0.2, 1.0)
     
     return round(confidence, 2)
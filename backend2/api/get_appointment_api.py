@@ -8,33 +8,21 @@ Uses direct Kolla API filtering for efficient appointment lookup
 Note: Matching is performed by patient phone number for accurate identification.
 """
 
+import asyncio
 import requests
-import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, HTTPException, Depends
 from services.auth_service import require_api_key
 from services.dob_verification_service import dob_verification_service
-from dotenv import load_dotenv
+from config import KOLLA_BASE_URL, KOLLA_HEADERS
 import logging
 
 from api.models import GetAppointmentRequest
 
-# Load environment variables
-load_dotenv()
-
 router = APIRouter(prefix="/api", tags=["appointments"])
 logger = logging.getLogger(__name__)
 
-# Kolla API configuration
-KOLLA_BASE_URL = os.getenv("KOLLA_BASE_URL", "https://unify.kolla.dev/dental/v1")
-KOLLA_HEADERS = {
-    "accept": "application/json",
-    "authorization": f"Bearer {os.getenv('KOLLA_BEARER_TOKEN')}",
-    "connector-id": os.getenv("KOLLA_CONNECTOR_ID", "eaglesoft"),
-    "consumer-id": os.getenv("KOLLA_CONSUMER_ID", "dajc")
-}
-
 @router.post("/get_appointment")
 async def get_appointment(request: GetAppointmentRequest, authenticated: bool = Depends(require_api_key)):
     """
@@ -154,47 +142,8 @@ async def fetch_appointments_by_phone_filter(patient_phone: str) -> List[Dict[st
         return []
 
 async def get_contact_by_phone_filter(patient_phone: str) -> Optional[Dict[str, Any]]:
-    """Get contact information using Kolla contacts filter"""
-    try:
-        contacts_url = f"{KOLLA_BASE_URL}/contacts"
-        
-        # Build filter for phone number search
-        # Phone number is already normalized (e.g., "5551234567")
-        filter_query = f"type='PATIENT' AND state='ACTIVE' AND phone='{patient_phone}'"
-        params = {"filter": filter_query}
-        
-    
-        logging.info(f"📞 Calling Kolla Contacts API: {contacts_url}")
-    
-        logging.info(f"   Filter: {filter_query}")
-    
-        logging.info(f"   Normalized phone: {patient_phone}")
-        
-        response = requests.get(contacts_url, headers=KOLLA_HEADERS, params=params, timeout=10)
-    
-        logging.info(f"   Response Status: {response.status_code}")
-        
-        if response.status_code != 200:
-            
-            logging.error(f"   ❌ API Error: {response.text}")
-            return None
-            
-        contacts_data = response.json()
-        contacts = contacts_data.get("contacts", [])
-        
-        if contacts:
-            # Return the first matching contact
-            contact = contacts[0]
-            
-            logging.info(f"   ✅ Found contact: {contact.get('given_name', '')} {contact.get('family_name', '')}")
-            return contact
-        
-        return None
-        
-    except Exception as e:
-    
-        logging.error(f"   ❌ Error getting contact by phone filter: {e}")
-        return None
+    """Get contact information using Kolla contacts filter (shared with DOB verification)"""
+    return await dob_verification_service.get_contact_by_phone(patient_phone)
 
 async def get_appointments_by_contact_filter(contact_id: str) -> List[Dict[str, Any]]:
     """Get appointments for a specific contact using Kolla appointments filter"""
@@ -203,8 +152,9 @@ async def get_appointments_by_contact_filter(contact_id: str) -> List[Dict[str,
         
         # Build filter for contact_id and future appointments
         # Get appointments from past 30 days to future 60 days
-        past_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%dT00:00:00Z")
-        future_date = (datetime.now() + timedelta(days=60)).strftime("%Y-%m-%dT23:59:59Z")
+        now = datetime.now()
+        past_date = (now - timedelta(days=30)).strftime("%Y-%m-%dT00:00:00Z")
+        future_date = (now + timedelta(days=60)).strftime("%Y-%m-%dT23:59:59Z")
         
         filter_query = f"contact_id='{contact_id}' AND start_time > '{past_date}' AND start_time < '{future_date}'"
         params = {"filter": filter_query}
@@ -214,7 +164,7 @@ async def get_appointments_by_contact_filter(contact_id: str) -> List[Dict[str,
     
         logging.info(f"   Filter: {filter_query}")
         
-        response = requests.get(appointments_url, headers=KOLLA_HEADERS, params=params, timeout=10)
+        response = await asyncio.to_thread(requests.get, appointments_url, headers=KOLLA_HEADERS, params=params, timeout=10)
     
         logging.info(f"   Response Status: {response.status_code}")
         
@@ -234,24 +184,32 @@ async def get_appointments_by_contact_filter(contact_id: str) -> List[Dict[str,
         
         # Enrich appointment data
         enriched_appointments = []
+        append = enriched_appointments.append
         for appointment in appointments:
-            enriched_appointment = {
+            get = appointment.get
+            start_time = get("start_time")
+            wall_start_time = get("wall_start_time")
+            providers = get("providers")
+            resources = get("resources")
+            notes = get("notes", "")
+            start_parts = start_time.split("T") if start_time else None
+            wall_parts = wall_start_time.split(" ") if wall_start_time else None
+            append({
                 **appointment,
-                "appointment_date": appointment.get("start_time", "").split("T")[0] if appointment.get("start_time") else None,
-                "appointment_time": appointment.get("start_time", "").split("T")[1] if appointment.get("start_time") else None,
-                "wall_date": appointment.get("wall_start_time", "").split(" ")[0] if appointment.get("wall_start_time") else None,
-                "wall_time": appointment.get("wall_start_time", "").split(" ")[1] if appointment.get("wall_start_time") else None,
-                "status": "confirmed" if appointment.get("confirmed") else "unconfirmed",
-                "cancelled": appointment.get("cancelled", False),
-                "completed": appointment.get("completed", False),
-                "duration_minutes": calculate_duration(appointment.get("start_time"), appointment.get("end_time")),
-                "provider": appointment.get("providers", [{}])[0].get("display_name", "") if appointment.get("providers") else "",
-                "operatory": appointment.get("resources", [{}])[0].get("display_name", "") if appointment.get("resources") else "",
-                "notes": appointment.get("notes", ""),
+                "appointment_date": start_parts[0] if start_parts else None,
+                "appointment_time": start_parts[1] if start_parts else None,
+                "wall_date": wall_parts[0] if wall_parts else None,
+                "wall_time": wall_parts[1] if wall_parts else None,
+                "status": "confirmed" if get("confirmed") else "unconfirmed",
+                "cancelled": get("cancelled", False),
+                "completed": get("completed", False),
+                "duration_minutes": calculate_duration(start_time, get("end_time")),
+                "provider": providers[0].get("display_name", "") if providers else "",
+                "operatory": resources[0].get("display_name", "") if resources else "",
+                "notes": notes,
                 # "short_description" is either omitted or set to notes
-                "short_description": appointment.get("notes", ""),
-            }
-            enriched_appointments.append(enriched_appointment)
+                "short_description": notes,
+            })
         
         return enriched_appointments
         
@@ -261,14 +219,15 @@ async def get_appointments_by_contact_filter(contact_id: str) -> List[Dict[str,
 
 def calculate_duration(start_time: str, end_time: str) -> Optional[int]:
     """Calculate appointment duration in minutes"""
+    if not (start_time and end_time):
+        return None
     try:
-        if start_time and end_time:
-            start = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
-            end = datetime.fromisoformat(end_time.replace("Z", "+00:00"))
-            return int((end - start).total_seconds() / 60)
-    except:
-        pass
-    return None
+        start = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
+        end = datetime.fromisoformat(end_time.replace("Z", "+00:00"))
+        return int((end - start).total_seconds() / 60)
+    except (ValueError, TypeError):
+        # Malformed timestamp or naive/aware mix
+        return None
 
 @router.get("/get_appointment_by_phone/{patient_phone}/{patient_dob}")
 async def get_appointment_by_phone_only(patient_phone: str, patient_dob: str, authenticated: bool = Depends(require_api_key)):
@@ -382,7 +341,7 @@ async def get_appointments_by_date_range(start_date: str, end_date: str) -> List
     
         logging.info(f"   Filter: {filter_query}")
         
-        response = requests.get(appointments_url, headers=KOLLA_HEADERS, params=params, timeout=10)
+        response = await asyncio.to_thread(requests.get, appointments_url, headers=KOLLA_HEADERS, params=params, timeout=10)
     
         logging.info(f"   Response Status: {response.status_code}")
         
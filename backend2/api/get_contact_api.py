@@ -6,35 +6,96 @@ Used for booking appointments with existing patients
 Uses direct Kolla API filtering for efficient contact lookup
 """
 
-import requests
-import os
-from datetime import datetime, timedelta
+import asyncio
+import httpx
+import orjson
 from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 from services.auth_service import require_api_key
 from services.dob_verification_service import dob_verification_service
-from dotenv import load_dotenv
+from services.ttl_cache import TTLCache
+from config import KOLLA_BASE_URL, KOLLA_HEADERS
 import logging
+from contextlib import asynccontextmanager
 
-from api.models import GetContactRequest
+from api.models import GetContactRequest, BatchGetContactRequest
 
-# Load environment variables
-load_dotenv()
-
-router = APIRouter(prefix="/api", tags=["contacts"])
+router = APIRouter(prefix="/api", tags=["contacts"], default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
-# Kolla API configuration
-KOLLA_BASE_URL = os.getenv("KOLLA_BASE_URL", "https://unify.kolla.dev/dental/v1")
-KOLLA_HEADERS = {
-    "accept": "application/json",
-    "authorization": f"Bearer {os.getenv('KOLLA_BEARER_TOKEN')}",
-    "connector-id": os.getenv("KOLLA_CONNECTOR_ID", "eaglesoft"),
-    "consumer-id": os.getenv("KOLLA_CONSUMER_ID", "dajc")
-}
+# Characters stripped when normalizing a phone number
+_PHONE_STRIP = str.maketrans("", "", " -()")
+
+# Input bounds checked before any Kolla round-trip
+MIN_PHONE_DIGITS = 7
+MAX_PHONE_DIGITS = 15
+MAX_NAME_LENGTH = 100
+
+def _normalize_number(s: Optional[str]) -> str:
+    """Digits only, so formatting and a leading + do not change the lookup key"""
+    if not s:
+        return ""
+    return ''.join(filter(str.isdigit, s))
+
+def _caller_matches(phone: str, caller: str) -> bool:
+    """Caller must be the same number as phone, allowing country code differences (both normalized)"""
+    return bool(caller) and (caller.endswith(phone) or phone.endswith(caller))
+
+def _is_valid_phone(phone: str) -> bool:
+    """Phone must be 7-15 digits (optionally with a leading +) to be safe in a Kolla filter"""
+    digits = phone[1:] if phone.startswith("+") else phone
+    return digits.isdigit() and MIN_PHONE_DIGITS <= len(digits) <= MAX_PHONE_DIGITS
+
+# Kolla lookup results, keyed by normalized phone / lowercased name
+CONTACT_CACHE_TTL_SECONDS = 6 * 3600
+_phone_cache = TTLCache(maxsize=10_000, ttl=CONTACT_CACHE_TTL_SECONDS)
+_name_cache = TTLCache(maxsize=10_000, ttl=CONTACT_CACHE_TTL_SECONDS)
+
+# Last ETag and body per phone, kept past the cache TTL so expired entries revalidate with If-None-Match
+CONTACT_ETAG_TTL_SECONDS = 7 * 24 * 3600
+_phone_etags = TTLCache(maxsize=10_000, ttl=CONTACT_ETAG_TTL_SECONDS)
+
+# Upper bound on concurrent Kolla requests issued by the batch endpoint
+BATCH_LOOKUP_CONCURRENCY = 16
+
+# Phone lookups currently in flight, so concurrent callers share one Kolla request
+_inflight: Dict[str, asyncio.Task] = {}
+
+# Shared async HTTP client for Kolla lookups (owned by the app lifespan in main.py)
+_client: Optional[httpx.AsyncClient] = None
+
+def create_kolla_client() -> httpx.AsyncClient:
+    """Build the Kolla client; Kolla is a single host so HTTP/2 multiplexes concurrent lookups"""
+    return httpx.AsyncClient(
+        base_url=KOLLA_BASE_URL,
+        headers=KOLLA_HEADERS,
+        http2=True,
+        timeout=httpx.Timeout(connect=2, read=8, write=2, pool=2),
+        limits=httpx.Limits(max_connections=64)
+    )
+
+@asynccontextmanager
+async def kolla_client_lifespan():
+    """Open the shared Kolla client for the lifetime of the app"""
+    global _client
+    _client = create_kolla_client()
+    try:
+        yield _client
+    finally:
+        await _client.aclose()
+        _client = None
+
+def get_kolla_client() -> httpx.AsyncClient:
+    """Dependency provider for the shared Kolla client (created lazily outside the app lifespan)"""
+    global _client
+    if _client is None:
+        _client = create_kolla_client()
+    return _client
 
 @router.post("/get_contact")
-async def get_contact(request: GetContactRequest, authenticated: bool = Depends(require_api_key)):
+async def get_contact(request: GetContactRequest, authenticated: bool = Depends(require_api_key),
+                      client: httpx.AsyncClient = Depends(get_kolla_client)):
     """
     Retrieves existing patient contact information using Kolla API filters
     Parameters: phone (required), dob (required for verification), name (optional for legacy support)
@@ -42,7 +103,7 @@ async def get_contact(request: GetContactRequest, authenticated: bool = Depends(
     DOB verification is required for accessing personal information.
     """
     try:
-        logger.info(f"Fetching contact for patient phone: {request.phone}")
+        logger.info("Fetching contact for patient phone: %s", request.phone)
 
         # Require caller to be provided for verification
         if not request.caller:
@@ -50,19 +111,18 @@ async def get_contact(request: GetContactRequest, authenticated: bool = Depends(
             raise HTTPException(status_code=400, detail="caller parameter is required")
 
         # Normalize phone and caller (digits only) and perform loose match (endswith) to account for country codes
-        def _normalize_number(s: Optional[str]) -> str:
-            if not s:
-                return ""
-            return ''.join(filter(str.isdigit, s))
-
         normalized_phone = _normalize_number(request.phone)
         normalized_caller = _normalize_number(request.caller)
 
-        logger.info(f"Normalized phone={normalized_phone}, caller={normalized_caller}")
+        logger.info("Normalized phone=%s, caller=%s", normalized_phone, normalized_caller)
+
+        if not _is_valid_phone(normalized_phone):
+            logger.warning("Rejected invalid phone in get_contact request: %s", request.phone)
+            raise HTTPException(status_code=422, detail="Invalid phone number")
 
         # Ensure caller matches phone (allow country code differences)
-        if not (normalized_caller.endswith(normalized_phone) or normalized_phone.endswith(normalized_caller)):
-            logger.warning(f"Caller number does not match phone: caller={request.caller}, phone={request.phone}")
+        if not _caller_matches(normalized_phone, normalized_caller):
+            logger.warning("Caller number does not match phone: caller=%s, phone=%s", request.caller, request.phone)
             raise HTTPException(status_code=403, detail="Caller number does not match provided phone")
 
         # First verify DOB against Kolla API
@@ -71,15 +131,15 @@ async def get_contact(request: GetContactRequest, authenticated: bool = Depends(
         )
 
         if not is_verified:
-            logger.warning(f"DOB verification failed for phone: {request.phone} - {verification_message}")
+            logger.warning("DOB verification failed for phone: %s - %s", request.phone, verification_message)
             raise HTTPException(status_code=403, detail=f"DOB verification failed: {verification_message}")
 
-        logger.info(f"✅ DOB verified for phone: {request.phone}")
+        logger.info("✅ DOB verified for phone: %s", request.phone)
 
         # Use Kolla API filter to search for contacts by phone number
         
         
-        contacts = await fetch_contacts_by_phone_filter(normalized_phone)
+        contacts = await fetch_contacts_by_phone_filter(normalized_phone, client)
         if contacts:
             return {
                 "success": True,
@@ -89,7 +149,7 @@ async def get_contact(request: GetContactRequest, authenticated: bool = Depends(
                 "source": "kolla_api_filter"
             }
         else:
-            logger.warning(f"No contact information found for phone: {request.phone}")
+            logger.warning("No contact information found for phone: %s", request.phone)
             raise HTTPException(status_code=404, detail="No contact found for specified patient")
         
     except HTTPException:
@@ -98,40 +158,70 @@ async def get_contact(request: GetContactRequest, authenticated: bool = Depends(
         logger.error("Error in get_contact", exc_info=True)
         raise HTTPException(status_code=500, detail="Internal error retrieving contact information")
 
-async def fetch_contacts_by_phone_filter(patient_phone: str) -> Optional[list]:
+async def fetch_contacts_by_phone_filter(patient_phone: str, client: Optional[httpx.AsyncClient] = None) -> Optional[list]:
     """Fetch all contact information from Kolla API using phone filter"""
+    if not _is_valid_phone(patient_phone):
+        logging.warning("   ⚠️ Skipping Kolla lookup for invalid phone: %r", patient_phone)
+        return None
+
+    cached = _phone_cache.get(patient_phone)
+    if cached is not None:
+        return cached
+
+    task = _inflight.get(patient_phone)
+    if task is None:
+        task = asyncio.create_task(_request_contacts_by_phone(patient_phone, client or get_kolla_client()))
+        _inflight[patient_phone] = task
+        task.add_done_callback(lambda _: _inflight.pop(patient_phone, None))
+    # Shield so one caller disconnecting does not cancel the lookup for the others
+    return await asyncio.shield(task)
+
+async def _request_contacts_by_phone(patient_phone: str, client: httpx.AsyncClient) -> Optional[list]:
+    """Issue the Kolla phone filter request and cache a successful result"""
     try:
-        contacts_url = f"{KOLLA_BASE_URL}/contacts?filter=phone=%27{patient_phone}%27"
-        response = requests.get(contacts_url, headers=KOLLA_HEADERS, timeout=10)
+        validator = _phone_etags.get(patient_phone)
+        headers = {"If-None-Match": validator[0]} if validator else None
+        response = await client.get("/contacts", params={"filter": f"phone='{patient_phone}'"}, headers=headers)
     
-        logging.info(f"   Response Status: {response.status_code}")
+        logging.info("   Response Status: %s", response.status_code)
+        if response.status_code == 304 and validator:
+            # Unchanged since the last fetch; reuse the stored body
+            contacts = validator[1]
+            _phone_cache.set(patient_phone, contacts)
+            return contacts
         if response.status_code != 200:            
-            logging.error(f"   ❌ API Error: {response.text}")
+            logging.error("   ❌ API Error: %s", response.text)
             return None
-        contacts_data = response.json()
+        contacts_data = orjson.loads(response.content)
         contacts = contacts_data.get("contacts", [])
     
-        logging.info(f"   ✅ Found {len(contacts)} contacts matching phone filter")
+        logging.info("   ✅ Found %s contacts matching phone filter", len(contacts))
         if contacts:
+            _phone_cache.set(patient_phone, contacts)
+            etag = response.headers.get("ETag")
+            if etag:
+                _phone_etags.set(patient_phone, (etag, contacts))
             return contacts
     
-        logging.warning(f"   ⚠️ No contact found for phone: {patient_phone}")
+        logging.warning("   ⚠️ No contact found for phone: %s", patient_phone)
         return None
     except Exception as e:    
-        logging.error(f"   ❌ Error fetching contact by phone filter: {e}")
+        logging.error("   ❌ Error fetching contact by phone filter: %s", e)
         return None
 
 @router.get("/get_contact/{patient_phone}/{patient_dob}")
-async def get_contact_by_url(patient_phone: str, patient_dob: str, authenticated: bool = Depends(require_api_key)):
+async def get_contact_by_url(patient_phone: str, patient_dob: str, authenticated: bool = Depends(require_api_key),
+                             client: httpx.AsyncClient = Depends(get_kolla_client)):
     """
     GET endpoint for retrieving contact information by phone and DOB
     URL format: /api/get_contact/{patient_phone}/{patient_dob}
     """
     request = GetContactRequest(phone=patient_phone, dob=patient_dob)
-    return await get_contact(request)
+    return await get_contact(request, authenticated, client)
 
 @router.post("/get_contact/refresh")
-async def refresh_contact_cache(request: GetContactRequest, authenticated: bool = Depends(require_api_key)):
+async def refresh_contact_cache(request: GetContactRequest, authenticated: bool = Depends(require_api_key),
+                                client: httpx.AsyncClient = Depends(get_kolla_client)):
     """Force refresh contact data from Kolla API with DOB verification"""
     try:
         # First verify DOB against Kolla API
@@ -140,12 +230,13 @@ async def refresh_contact_cache(request: GetContactRequest, authenticated: bool
         )
         
         if not is_verified:
-            logger.warning(f"DOB verification failed for phone: {request.phone} - {verification_message}")
+            logger.warning("DOB verification failed for phone: %s - %s", request.phone, verification_message)
             raise HTTPException(status_code=403, detail=f"DOB verification failed: {verification_message}")
         
-        # Since we're not using cache anymore, this just fetches fresh data
-        normalized_phone = request.phone.replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
-        contacts = await fetch_contacts_by_phone_filter(normalized_phone)
+        # Drop any cached lookup so this fetches fresh data
+        normalized_phone = request.phone.translate(_PHONE_STRIP)
+        _phone_cache.pop(normalized_phone, None)
+        contacts = await fetch_contacts_by_phone_filter(normalized_phone, client)
         return {
             "success": True,
             "message": "Contact data refreshed from Kolla API",
@@ -158,18 +249,70 @@ async def refresh_contact_cache(request: GetContactRequest, authenticated: bool
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error refreshing contact data: {str(e)}")
 
+@router.post("/get_contact/batch")
+async def get_contacts_batch(request: BatchGetContactRequest, authenticated: bool = Depends(require_api_key),
+                             client: httpx.AsyncClient = Depends(get_kolla_client)):
+    """
+    Look up contacts for several patients in one call
+    Every entry must match the caller number and carry its own DOB, verified the same
+    way as get_contact; contacts are only returned for verified entries. Results come
+    back in request order, one per entry. Lookups fan out concurrently (bounded) and
+    share the phone cache, so duplicates cost no extra Kolla round-trip
+    """
+    normalized_caller = _normalize_number(request.caller)
+    semaphore = asyncio.Semaphore(BATCH_LOOKUP_CONCURRENCY)
+
+    async def lookup(normalized_phone: str, dob: str) -> Dict[str, Any]:
+        if not _is_valid_phone(normalized_phone):
+            return {"dob_verified": False, "contacts": [], "message": "Invalid phone number"}
+        if not _caller_matches(normalized_phone, normalized_caller):
+            logger.warning("Caller number does not match batch phone: caller=%s, phone=%s", request.caller, normalized_phone)
+            return {"dob_verified": False, "contacts": [], "message": "Caller number does not match provided phone"}
+        async with semaphore:
+            is_verified, verification_message, _ = await dob_verification_service.verify_dob(normalized_phone, dob)
+            if not is_verified:
+                logger.warning("DOB verification failed for phone: %s - %s", normalized_phone, verification_message)
+                return {"dob_verified": False, "contacts": [], "message": verification_message}
+            contacts = await fetch_contacts_by_phone_filter(normalized_phone, client)
+        return {"dob_verified": True, "contacts": contacts or []}
+
+    entries = [(_normalize_number(patient.phone), patient.dob) for patient in request.patients]
+    unique_entries = list(dict.fromkeys(entries))
+    unique_results = await asyncio.gather(*(lookup(phone, dob) for phone, dob in unique_entries))
+    result_by_entry = dict(zip(unique_entries, unique_results))
+
+    results = [
+        {"phone": patient.phone, **result_by_entry[entry]}
+        for patient, entry in zip(request.patients, entries)
+    ]
+    return {
+        "success": True,
+        "total_requested": len(results),
+        "total_found": sum(1 for result in results if result["contacts"]),
+        "results": results,
+        "source": "kolla_api_filter"
+    }
+
 @router.get("/contacts/search")
 async def search_contacts(name: Optional[str] = None,
     email: Optional[str] = None,
-    phone: Optional[str] = None, authenticated: bool = Depends(require_api_key)):
+    phone: Optional[str] = None, authenticated: bool = Depends(require_api_key),
+    client: httpx.AsyncClient = Depends(get_kolla_client)):
     """
     Search contacts with flexible parameters using Kolla API filters
     """
+    if not phone and not name:
+        return {
+            "success": False,
+            "message": "Please provide either phone or name parameter for contact search",
+            "available_parameters": ["phone", "name"]
+        }
+
     try:
         if phone:
             # Use phone-based search
-            normalized_phone = phone.replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
-            contacts = await fetch_contacts_by_phone_filter(normalized_phone)
+            normalized_phone = phone.translate(_PHONE_STRIP)
+            contacts = await fetch_contacts_by_phone_filter(normalized_phone, client)
             if contacts:
                 return {
                     "success": True,
@@ -187,7 +330,7 @@ async def search_contacts(name: Optional[str] = None,
         
         if name:
             # Search by name using Kolla filter
-            contact_info = await fetch_contact_by_name_filter(name)
+            contact_info = await fetch_contact_by_name_filter(name, client)
             
             if contact_info:
                 return {
@@ -204,47 +347,52 @@ async def search_contacts(name: Optional[str] = None,
                     "contacts": []
                 }
         
-        return {
-            "success": False,
-            "message": "Please provide either phone or name parameter for contact search",
-            "available_parameters": ["phone", "name"]
-        }
-        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching contacts: {str(e)}")
 
-async def fetch_contact_by_name_filter(patient_name: str) -> Optional[List[Dict[str, Any]]]:
+async def fetch_contact_by_name_filter(patient_name: str, client: Optional[httpx.AsyncClient] = None) -> Optional[List[Dict[str, Any]]]:
     """Fetch contact information from Kolla API using name filter"""
+    if not patient_name or len(patient_name) > MAX_NAME_LENGTH:
+        logging.warning("   ⚠️ Skipping Kolla lookup for invalid name (length %s)", len(patient_name or ''))
+        return None
+
+    cache_key = patient_name.lower()
+    cached = _name_cache.get(cache_key)
+    if cached is not None:
+        return cached
     try:
         contacts_url = f"{KOLLA_BASE_URL}/contacts"
         
         # Build filter for name search
-        filter_query = f"type='PATIENT' AND state='ACTIVE' AND name='{patient_name}'"
+        # Double single quotes so the name cannot terminate the filter literal
+        escaped_name = patient_name.replace("'", "''")
+        filter_query = f"type='PATIENT' AND state='ACTIVE' AND name='{escaped_name}'"
         
         params = {"filter": filter_query}
         
     
-        logging.info(f"📞 Calling Kolla API: {contacts_url}")    
-        logging.info(f"   Filter: {filter_query}")
+        logging.info("📞 Calling Kolla API: %s", contacts_url)    
+        logging.info("   Filter: %s", filter_query)
         
-        response = requests.get(contacts_url, headers=KOLLA_HEADERS, params=params, timeout=10)
+        response = await (client or get_kolla_client()).get("/contacts", params=params)
     
-        logging.info(f"   Response Status: {response.status_code}")
+        logging.info("   Response Status: %s", response.status_code)
         
         if response.status_code != 200:            
-            logging.error(f"   ❌ API Error: {response.text}")
+            logging.error("   ❌ API Error: %s", response.text)
             return None
             
-        contacts_data = response.json()
+        contacts_data = orjson.loads(response.content)
         contacts = contacts_data.get("contacts", [])            
-        logging.info(f"   ✅ Found {len(contacts)} contacts matching name filter")
+        logging.info("   ✅ Found %s contacts matching name filter", len(contacts))
         
         if contacts:
+            _name_cache.set(cache_key, contacts)
             return contacts
         
-        logging.warning(f"   ⚠️ No contact found for name: {patient_name}")
+        logging.warning("   ⚠️ No contact found for name: %s", patient_name)
         return None
         
     except Exception as e:    
-        logging.error(f"   ❌ Error fetching contact by name filter: {e}")
+        logging.error("   ❌ Error fetching contact by name filter: %s", e)
         return None
@@ -3,13 +3,25 @@ Current Date/Time API
 Provides current day and date information
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Dict, Any
-import pytz, logging
+from typing import Dict, Any, Optional
+from zoneinfo import ZoneInfo
+from api.errors import http_error
+import logging, sys, time
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
+
+# Resolved once at import; zoneinfo is stdlib and C-accelerated
+EASTERN = ZoneInfo("America/New_York")
+# Name reported to clients (unchanged from the previous pytz 'US/Eastern' zone)
+EASTERN_NAME = sys.intern("US/Eastern")
+
+# Indexed by datetime.weekday() so the day name needs no strftime call
+_DAYS = tuple(sys.intern(d) for d in ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"))
 
 class CurrentDateTimeResponse(BaseModel):
     success: bool
@@ -18,43 +30,54 @@ class CurrentDateTimeResponse(BaseModel):
     datetime: str
     timezone: str
 
-@router.get("/get_current")
-async def get_current() -> CurrentDateTimeResponse:
+# Documents the response shape in OpenAPI without validating each response through the model
+_RESPONSES = {200: {"model": CurrentDateTimeResponse}}
+
+# Last response and the epoch second it describes; reused until the clock ticks over
+_cached_response: Optional[Dict[str, Any]] = None
+_cached_second = -1
+
+@router.get("/get_current", responses=_RESPONSES)
+async def get_current(nocache: bool = False):
     """
     Get current day and date information
     Returns current day of week, date in YYYY-MM-DD format, and datetime
+    Responses are reused within the same wall-clock second (pass nocache=true to bypass)
     """
+    global _cached_response, _cached_second
     try:
+        timestamp = time.time()
+        second = int(timestamp)
+        if not nocache and second == _cached_second:
+            return _cached_response
+
         # Get current datetime in EST/EDT (New Jersey timezone)
-        eastern = pytz.timezone('US/Eastern')
-        now = datetime.now(eastern)
+        now = datetime.fromtimestamp(timestamp, EASTERN)
         
         # Format the response
-        current_day = now.strftime("%A")  # Full day name (e.g., "Monday")
-        current_date = now.strftime("%Y-%m-%d")  # YYYY-MM-DD format
         current_datetime = now.strftime("%Y-%m-%d %H:%M:%S")  # Full datetime
-        timezone = str(now.tzinfo)
+        current_date = current_datetime[:10]  # YYYY-MM-DD format
+        current_time = current_datetime[11:]  # HH:MM:SS
+        current_day = _DAYS[now.weekday()]  # Full day name (e.g., "Monday")
+        timezone = EASTERN_NAME
         
     
-        logging.info(f"🕐 Current datetime requested: {current_day}, {current_date} at {now.strftime('%H:%M:%S')} {timezone}")
+        logger.debug("🕐 Current datetime requested: %s, %s at %s %s", current_day, current_date, current_time, timezone)
         
-        return CurrentDateTimeResponse(
-            success=True,
-            day=current_day,
-            date=current_date,
-            datetime=current_datetime,
-            timezone=timezone
-        )
+        response = {
+            "success": True,
+            "day": current_day,
+            "date": current_date,
+            "datetime": current_datetime,
+            "timezone": timezone
+        }
+        _cached_response, _cached_second = response, second
+        return response
         
     except Exception as e:
     
-        logging.error(f"❌ Error getting current datetime: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to get current datetime: {str(e)}")
+        logger.error("❌ Error getting current datetime: %s", e)
+        raise http_error(500, "Failed to get current datetime", e)
 
-# Alternative endpoint with different path structure if needed
-@router.get("/current")
-async def get_current_alternative() -> CurrentDateTimeResponse:
-    """
-    Alternative endpoint for getting current day and date information
-    """
-    return await get_current()
\ No newline at end of file
+# Alternative endpoint with different path structure if needed (same handler, no wrapper)
+router.add_api_route("/current", get_current, methods=["GET"], responses=_RESPONSES)
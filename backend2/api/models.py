@@ -2,10 +2,14 @@
 Shared Pydantic models for the API
 Contains all the data models used across different API endpoints
 """
-from typing import Dict, List, Optional, Any, Union
-from pydantic import BaseModel
+from typing import Dict, List, Optional, Any
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
-class ContactInfo(BaseModel):
+class FrozenModel(BaseModel):
+    """Immutable base for request/response schemas; unknown fields are dropped"""
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+class ContactInfo(FrozenModel):
     number: Optional[str] = None
     email: Optional[str] = None
     given_name: Optional[str] = None
@@ -32,10 +36,10 @@ class ContactInfo(BaseModel):
     guarantor: Optional[str] = None
     additional_data: Optional[Dict[str, Any]] = None
 
-class BookAppointmentRequest(BaseModel):
+class BookAppointmentRequest(FrozenModel):
     name: str
     contact_id: str # existing contact ID to link
-    contact: Union[str, Dict[str, Any], ContactInfo]  # Accept string, dict, or ContactInfo
+    contact: Any  # Accept string, dict, or ContactInfo (checked in _check_contact_shape)
     day: str
     date: str  # Added date field
     dob: Optional[str] = None  # Added patient date of birth
@@ -43,7 +47,7 @@ class BookAppointmentRequest(BaseModel):
     is_new_patient: bool
     service_booked: str
     doctor_for_appointment: str
-    patient_details: Optional[Union[str, Dict[str, Any]]] = None  # Accept both string and dict
+    patient_details: Any = None  # Accept both string and dict (checked in _check_contact_shape)
     # Optionally allow direct passing of expanded contact info
     contact_info: Optional[ContactInfo] = None
     # Additional fields used by the booking API
@@ -59,14 +63,28 @@ class BookAppointmentRequest(BaseModel):
     # Personal information fields
     gender: Optional[str] = None  # e.g., 'MALE', 'FEMALE', 'GENDER_UNSPECIFIED'
 
-class CheckSlotsRequest(BaseModel):
+    @field_validator("contact", "patient_details", mode="before")
+    @classmethod
+    def _check_contact_shape(cls, value: Any, info) -> Any:
+        """Dispatch on type directly instead of letting Pydantic try each Union branch"""
+        if isinstance(value, (str, dict)):
+            return value
+        if info.field_name == "contact":
+            if isinstance(value, ContactInfo):
+                return value
+            raise ValueError("contact must be a string, dict, or ContactInfo")
+        if value is None:
+            return value
+        raise ValueError("patient_details must be a string or dict")
+
+class CheckSlotsRequest(FrozenModel):
     day: str
 
-class CheckServiceSlotsRequest(BaseModel):
+class CheckServiceSlotsRequest(FrozenModel):
     service_type: str
     date: Optional[str] = None  # Specific date (YYYY-MM-DD), if not provided will check next 7 days
 
-class RescheduleRequest(BaseModel):
+class RescheduleRequest(FrozenModel):
     appointment_id: str
     start_time: str  # ISO format datetime string
     end_time: str    # ISO format datetime string
@@ -77,18 +95,18 @@ class RescheduleRequest(BaseModel):
     reason: Optional[str] = None
     new_slot: Optional[str] = None
 
-class CallbackRequest(BaseModel):
+class CallbackRequest(FrozenModel):
     name: str
     contact_number: str
     preferred_callback_time: str
 
-class SendFormRequest(BaseModel):
+class SendFormRequest(FrozenModel):
     contact_number: str
 
-class FAQRequest(BaseModel):
+class FAQRequest(FrozenModel):
     query: str
 
-class ConversationSummaryRequest(BaseModel):
+class ConversationSummaryRequest(FrozenModel):
     summary: Optional[str] = None  # Accepts a summary string
     patient_name: Optional[str] = None
     primary_intent: Optional[str] = None
@@ -98,47 +116,56 @@ class ConversationSummaryRequest(BaseModel):
     additional_notes: Optional[str] = None
 
 # New models for the core APIs
-class GetAppointmentRequest(BaseModel):
+class GetAppointmentRequest(FrozenModel):
     phone: str
     dob: str  # Required DOB for verification
     caller: Optional[str] = None  # Number the call is coming from; used to verify caller matches phone
 
-class AppointmentDetailsRequest(BaseModel):
+class AppointmentDetailsRequest(FrozenModel):
     phone: str
-    dob: str  # Required DOB for verification
-    caller: Optional[str] = None
 
-class ConfirmByPhoneRequest(BaseModel):
+class ConfirmByPhoneRequest(FrozenModel):
     phone: str
-    dob: str  # Required DOB for verification
     name: Optional[str] = None
+    dob: Optional[str] = None  # Date of birth
     confirmed: bool = True
     confirmation_type: Optional[str] = "confirmationTypes/1"
     notes: Optional[str] = None
 
-class GetContactRequest(BaseModel):
+class GetContactRequest(FrozenModel):
     phone: str  # Changed from name to phone for consistent patient identification
     dob: str  # Required DOB for verification
     caller: Optional[str] = None
     # Legacy support
     name: Optional[str] = None
 
-class AvailabilityRequest(BaseModel):
+# Upper bound on lookups per batch call, so one request cannot fan out to unbounded Kolla calls
+MAX_BATCH_CONTACT_LOOKUPS = 50
+
+class BatchContactLookup(FrozenModel):
+    phone: str
+    dob: str  # Required DOB for verification, as in GetContactRequest
+
+class BatchGetContactRequest(FrozenModel):
+    caller: str  # Number the call is coming from; every phone must match it, as in GetContactRequest
+    patients: List[BatchContactLookup] = Field(..., min_length=1, max_length=MAX_BATCH_CONTACT_LOOKUPS)
+
+class AvailabilityRequest(FrozenModel):
     date: str  # YYYY-MM-DD format
 
-class LogCallbackRequest(BaseModel):
+class LogCallbackRequest(FrozenModel):
     name: str
     contact: str
     reason: str
     preferred_callback_time: Optional[str] = None
 
-class SendNewPatientFormRequest(BaseModel):
+class SendNewPatientFormRequest(FrozenModel):
     phone_number: str
 
-class AnswerFAQRequest(BaseModel):
+class AnswerFAQRequest(FrozenModel):
     query: str
 
-class LogConversationRequest(BaseModel):
+class LogConversationRequest(FrozenModel):
     patient_name: Optional[str] = None
     conversation_summary: str
     call_outcome: str
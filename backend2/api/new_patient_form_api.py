@@ -4,15 +4,89 @@ Sends new patient forms to a phone number
 Used in the new patient onboarding process
 """
 
-import requests
+import asyncio
+import httpx
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Dict, Optional, Any
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 from services.auth_service import require_api_key
 import logging
 from api.models import SendNewPatientFormRequest
+from api.errors import http_error
+from config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER, NEW_PATIENT_FORM_SMS_ENABLED
 
-router = APIRouter(prefix="/api", tags=["patient-forms"])
+router = APIRouter(prefix="/api", tags=["patient-forms"], default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
+
+_SMS_TEMPLATE = (
+    "Welcome to BrightSmile Dental Clinic!\n\n"
+    "Please complete your new patient intake form before your appointment:\n"
+    "{form_link}\n\n"
+    "{instructions}\n\n"
+    "If you have any questions, please call us at (555) 123-4567."
+)
+
+TWILIO_MESSAGES_URL = f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Messages.json"
+
+# Shared SMS client, opened by the app lifespan so sends reuse one keep-alive connection
+_sms_client: Optional[httpx.AsyncClient] = None
+
+# Form sends are queued and dispatched off the request path while the app is running
+SMS_BATCH_SIZE = 20
+SMS_BATCH_WINDOW = 0.2  # seconds to wait for a batch to fill
+LOG_FLUSH_INTERVAL = 1.0  # seconds between form-sent log flushes
+SHUTDOWN_DRAIN_TIMEOUT = 5.0
+_form_queue: Optional[asyncio.Queue] = None
+_log_queue: Optional[asyncio.Queue] = None
+
+@asynccontextmanager
+async def sms_client_lifespan():
+    """Open the shared SMS client and start the dispatch workers for the lifetime of the app"""
+    global _sms_client, _form_queue, _log_queue
+    _sms_client = httpx.AsyncClient(timeout=5.0)
+    _form_queue = asyncio.Queue()
+    _log_queue = asyncio.Queue()
+    workers = [
+        asyncio.create_task(sms_worker(_form_queue, _log_queue)),
+        asyncio.create_task(form_log_worker(_log_queue))
+    ]
+    try:
+        yield _sms_client
+    finally:
+        # Give queued sends a chance to go out before shutting down
+        try:
+            await asyncio.wait_for(_form_queue.join(), SHUTDOWN_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Dropping %s queued patient form SMS on shutdown", _form_queue.qsize())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        _flush_form_logs(_log_queue)
+        _form_queue = _log_queue = None
+        await _sms_client.aclose()
+        _sms_client = None
+
+def get_sms_client() -> httpx.AsyncClient:
+    """Return the shared SMS client (created lazily outside the app lifespan)"""
+    global _sms_client
+    if _sms_client is None:
+        _sms_client = httpx.AsyncClient(timeout=5.0)
+    return _sms_client
+
+# Deletes every Latin-1 non-digit in one C-level pass
+_NON_DIGITS = str.maketrans("", "", "".join(chr(c) for c in range(256) if not chr(c).isdigit()))
+
+# National (10) or country-code-prefixed (11) digit counts
+_VALID_PHONE_LENGTHS = frozenset((10, 11))
+
+def _digits_only(value: str) -> str:
+    """Strip formatting characters from a phone number"""
+    digits = value.translate(_NON_DIGITS)
+    # Characters outside Latin-1 are not in the table; fall back to the slow path for them
+    return digits if digits.isascii() else ''.join(filter(str.isdigit, digits))
 
 @router.post("/send_new_patient_form")
 async def send_new_patient_form(request: SendNewPatientFormRequest, authenticated: bool = Depends(require_api_key)):
@@ -27,27 +101,42 @@ async def send_new_patient_form(request: SendNewPatientFormRequest, authenticate
             raise HTTPException(status_code=400, detail="Phone number is required")
         
         # Format phone number (remove any formatting characters)
-        formatted_phone = ''.join(filter(str.isdigit, phone_number))
+        formatted_phone = _digits_only(phone_number)
         
-        if len(formatted_phone) != 10 and len(formatted_phone) != 11:
+        if len(formatted_phone) not in _VALID_PHONE_LENGTHS:
             raise HTTPException(status_code=400, detail="Invalid phone number format")
         
+        # One clock read shared by the form link and the sent-at timestamp
+        now = datetime.now()
+        
         # Create the patient form link/message
         form_data = {
             "phone_number": formatted_phone,
             "form_type": "new_patient_intake",
             "clinic_name": "BrightSmile Dental Clinic",
-            "form_link": generate_patient_form_link(formatted_phone),
+            "form_link": generate_patient_form_link(formatted_phone, now),
             "instructions": "Please complete this form before your appointment",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now.isoformat()
         }
         
+        if _form_queue is not None:
+            # Hand off to the SMS worker and return without waiting on the provider
+            await _form_queue.put(form_data)
+            return {
+                "success": True,
+                "message": "New patient form queued for delivery",
+                "status": "queued",
+                "phone_number": formatted_phone,
+                "form_link": form_data["form_link"],
+                "sent_at": form_data["timestamp"]
+            }
+        
         # Send the form (this would integrate with SMS service)
         success = await send_form_via_sms(form_data)
         
         if success:
             # Log the form send event
-            await log_form_sent_event(form_data)
+            log_form_sent_event(form_data)
             
             return {
                 "success": True,
@@ -67,45 +156,80 @@ async def send_new_patient_form(request: SendNewPatientFormRequest, authenticate
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error sending patient form: {str(e)}")
+        raise http_error(500, "Error sending patient form", e)
 
-def generate_patient_form_link(phone_number: str) -> str:
+def generate_patient_form_link(phone_number: str, now: Optional[datetime] = None) -> str:
     """Generate a unique form link for the patient"""
     # This would generate a secure, unique link for the patient
     # For now, we'll create a placeholder link
-    form_id = f"form_{phone_number}_{int(datetime.now().timestamp())}"
+    sent_at = int(now.timestamp()) if now is not None else int(time.time())
+    form_id = f"form_{phone_number}_{sent_at}"
     return f"https://forms.brightsmile-dental.com/new-patient/{form_id}"
 
-async def send_form_via_sms(form_data: Dict[str, Any]) -> bool:
-    """Send the form link via SMS"""
-    try:
-        # This would integrate with an SMS service like Twilio, AWS SNS, etc.
-        # For now, we'll simulate the SMS sending
-        
-        message = f"""
-Welcome to BrightSmile Dental Clinic!
+async def sms_worker(form_queue: asyncio.Queue, log_queue: asyncio.Queue):
+    """Drain queued forms in batches of up to SMS_BATCH_SIZE and send each batch concurrently"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await form_queue.get()]
+        deadline = loop.time() + SMS_BATCH_WINDOW
+        while len(batch) < SMS_BATCH_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(form_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        try:
+            results = await asyncio.gather(*(send_form_via_sms(form_data) for form_data in batch))
+            for form_data, success in zip(batch, results):
+                if success:
+                    log_queue.put_nowait(form_data)
+                else:
+                    logger.error("Queued patient form SMS to %s failed", form_data['phone_number'])
+        finally:
+            for _ in batch:
+                form_queue.task_done()
 
-Please complete your new patient intake form before your appointment:
-{form_data['form_link']}
+async def form_log_worker(log_queue: asyncio.Queue):
+    """Flush form-sent log entries once per LOG_FLUSH_INTERVAL"""
+    while True:
+        await asyncio.sleep(LOG_FLUSH_INTERVAL)
+        _flush_form_logs(log_queue)
 
-{form_data['instructions']}
+def _flush_form_logs(log_queue: asyncio.Queue):
+    """Write out every pending form-sent log entry"""
+    while not log_queue.empty():
+        log_form_sent_event(log_queue.get_nowait())
 
-If you have any questions, please call us at (555) 123-4567.
-        """.strip()
+async def send_form_via_sms(form_data: Dict[str, Any]) -> bool:
+    """Send the form link via SMS"""
+    try:
+        message = _SMS_TEMPLATE.format_map(form_data)
         
-        # Simulate SMS sending (replace with actual SMS service)    
-        logging.info(f"SMS would be sent to {form_data['phone_number']}: {message}")
+        if not NEW_PATIENT_FORM_SMS_ENABLED or not all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER]):
+            # Simulate SMS sending unless real form texts are enabled and Twilio is configured
+            logger.info("SMS would be sent to %s: %s", form_data['phone_number'], message)
+            return True
         
-        # For demo purposes, always return True
-        # In production, this would return the actual SMS delivery status
+        phone = form_data['phone_number']
+        to_number = f"+1{phone}" if len(phone) == 10 else f"+{phone}"
+        response = await get_sms_client().post(
+            TWILIO_MESSAGES_URL,
+            data={"To": to_number, "From": TWILIO_PHONE_NUMBER, "Body": message},
+            auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        )
+        response.raise_for_status()
         return True
         
     except Exception as e:    
-        logging.error(f"Error sending SMS: {e}")
+        logger.error("Error sending SMS: %s", e)
         return False
 
-async def log_form_sent_event(form_data: Dict[str, Any]):
+def log_form_sent_event(form_data: Dict[str, Any]):
     """Log the form sending event for tracking"""
+    if not logger.isEnabledFor(logging.INFO):
+        return
     try:
         # This would log to a database or logging service
         log_entry = {
@@ -116,34 +240,36 @@ async def log_form_sent_event(form_data: Dict[str, Any]):
             "status": "sent"
         }
         
-        # For now, just print the log entry
-        print(f"Form sent log: {log_entry}")
+        # The entry also rides along as record.event for structured handlers
+        logger.info("Form sent log: %s", log_entry, extra={"event": log_entry})
         
         # In production, you would save this to a database
         
     except Exception as e:
-        print(f"Error logging form sent event: {e}")
+        logger.error("Error logging form sent event: %s", e)
 
+# Fixed part of the placeholder status response
+_PLACEHOLDER_FORM_STATUS = {
+    "form_status": "sent",
+    "completion_status": "pending",
+    "sent_at": "2024-01-01T12:00:00",
+    "completed_at": None,
+    "message": "Form sent, awaiting completion"
+}
+
+# Kept async: it never blocks, so it runs inline on the event loop instead of in the threadpool
 @router.get("/new_patient_form_status/{phone_number}")
 async def get_form_status(phone_number: str, authenticated: bool = Depends(require_api_key)):
     """Check the status of a sent form"""
     try:
-        formatted_phone = ''.join(filter(str.isdigit, phone_number))
+        formatted_phone = _digits_only(phone_number)
         
         # This would check the actual form completion status
         # For now, return a placeholder response
-        return {
-            "success": True,
-            "phone_number": formatted_phone,
-            "form_status": "sent",
-            "completion_status": "pending",
-            "sent_at": "2024-01-01T12:00:00",
-            "completed_at": None,
-            "message": "Form sent, awaiting completion"
-        }
+        return {"success": True, "phone_number": formatted_phone, **_PLACEHOLDER_FORM_STATUS}
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error checking form status: {str(e)}")
+        raise http_error(500, "Error checking form status", e)
 
 @router.post("/resend_new_patient_form")
 async def resend_new_patient_form(request: SendNewPatientFormRequest, authenticated: bool = Depends(require_api_key)):
@@ -159,7 +285,7 @@ async def resend_new_patient_form(request: SendNewPatientFormRequest, authentica
         return result
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error resending patient form: {str(e)}")
+        raise http_error(500, "Error resending patient form", e)
 
 @router.get("/patient_forms/stats")
 async def get_form_stats(authenticated: bool = Depends(require_api_key)):
@@ -180,4 +306,4 @@ async def get_form_stats(authenticated: bool = Depends(require_api_key)):
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting form stats: {str(e)}")
+        raise http_error(500, "Error getting form stats", e)
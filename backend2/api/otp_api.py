@@ -2,53 +2,87 @@
 OTP API endpoints for sending and verifying SMS OTPs
 """
 
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel, Field
-from typing import Optional
+from fastapi.responses import ORJSONResponse
+from pydantic import AfterValidator, ConfigDict, Field
+from functools import lru_cache
+from typing import Annotated, Any, Dict, Optional
 import logging
+import sys
 
-from services.otp_service import otp_service
+from services.otp_service import otp_service, normalize_phone_number
 from services.auth_service import require_api_key
+from services.rate_limiter import TokenBucketLimiter
+from services.ttl_cache import TTLCache
+from api.models import FrozenModel
 
-router = APIRouter(prefix="/api/otp", tags=["otp"])
+router = APIRouter(prefix="/api/otp", tags=["otp"], default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
+# Per-phone limits (keyed by number, not client IP, since IPs are cheap to rotate)
+send_rate_limiter = TokenBucketLimiter(times=1, seconds=30)
+verify_rate_limiter = TokenBucketLimiter(times=5, seconds=300)
 
-class SendOTPRequest(BaseModel):
-    phone_number: str = Field(..., description="Phone number to send OTP to (with or without country code)")
+
+# /status responses per normalized phone for one second; dropped early whenever that number sends or verifies
+_status_cache = TTLCache(maxsize=10000, ttl=1)
+
+
+def enforce_rate_limit(limiter: TokenBucketLimiter, phone_number: str):
+    """Raise 429 when this phone number is over the limiter's budget"""
+    if not limiter.allow(phone_number):
+        raise HTTPException(status_code=429, detail="Too many requests for this phone number. Please try again later.")
+
+
+# Phone numbers are normalized once at validation; storage, rate limits, caches and logs share the interned form
+CanonicalPhone = Annotated[str, AfterValidator(lambda v: sys.intern(normalize_phone_number(v)))]
+
+
+class SendOTPRequest(FrozenModel):
+    phone_number: CanonicalPhone = Field(..., description="Phone number to send OTP to (with or without country code)")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        extra="forbid",
+        str_strip_whitespace=True,
+        json_schema_extra={
             "example": {
                 "phone_number": "+1234567890"
             }
         }
+    )
 
 
-class VerifyOTPRequest(BaseModel):
-    phone_number: str = Field(..., description="Phone number that received the OTP")
+class VerifyOTPRequest(FrozenModel):
+    phone_number: CanonicalPhone = Field(..., description="Phone number that received the OTP")
     otp: str = Field(..., description="The OTP code to verify", min_length=4, max_length=10)
     otp_id: Optional[str] = Field(None, description="Optional OTP ID for additional verification")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        extra="forbid",
+        str_strip_whitespace=True,
+        json_schema_extra={
             "example": {
                 "phone_number": "+1234567890",
                 "otp": "123456",
                 "otp_id": "otp_hash_20241018"
             }
         }
+    )
 
 
-class OTPStatusRequest(BaseModel):
-    phone_number: str = Field(..., description="Phone number to check OTP status for")
+class OTPStatusRequest(FrozenModel):
+    phone_number: CanonicalPhone = Field(..., description="Phone number to check OTP status for")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        extra="forbid",
+        str_strip_whitespace=True,
+        json_schema_extra={
             "example": {
                 "phone_number": "+1234567890"
             }
         }
+    )
 
 
 @router.post("/send")
@@ -62,8 +96,11 @@ async def send_otp(
     - **phone_number**: Phone number to send OTP to (will be normalized)
     - Returns OTP ID for tracking and additional security
     """
+    enforce_rate_limit(send_rate_limiter, request.phone_number)
     try:
-        success, message, otp_id = otp_service.send_otp(request.phone_number)
+        # The SMS provider call is blocking; run it off the event loop
+        success, message, otp_id = await asyncio.to_thread(otp_service.send_otp, request.phone_number)
+        _status_cache.pop(request.phone_number)
         
         if success:
             logger.info(f"OTP sent successfully to {request.phone_number}")
@@ -95,12 +132,14 @@ async def verify_otp(
     - **otp**: The OTP code to verify
     - **otp_id**: Optional OTP ID for additional security (recommended)
     """
+    enforce_rate_limit(verify_rate_limiter, request.phone_number)
     try:
         success, message = otp_service.verify_otp(
             request.phone_number, 
             request.otp, 
             request.otp_id
         )
+        _status_cache.pop(request.phone_number)
         
         if success:
             logger.info(f"OTP verified successfully for {request.phone_number}")
@@ -136,9 +175,12 @@ async def get_otp_status(
     - Returns information about current OTP state
     """
     try:
-        status = otp_service.get_otp_status(request.phone_number)
-        
+        status = _status_cache.get(request.phone_number)
         if status is None:
+            status = otp_service.get_otp_status(request.phone_number) or {}
+            _status_cache.set(request.phone_number, status)
+        
+        if not status:
             return {
                 "success": True,
                 "phone_number": request.phone_number,
@@ -162,7 +204,7 @@ async def cleanup_expired_otps(
     authenticated: bool = Depends(require_api_key)
 ):
     """
-    Manually cleanup expired OTPs (normally done automatically)
+    Manually cleanup expired OTPs (expired OTPs are otherwise dropped lazily on lookup)
     
     - Removes all expired OTPs from memory
     - Useful for maintenance or testing
@@ -180,6 +222,19 @@ async def cleanup_expired_otps(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@lru_cache(maxsize=1)
+def _static_otp_config() -> Dict[str, Any]:
+    """OTP settings that are fixed for the life of the process"""
+    return {
+        "otp_length": otp_service.otp_length,
+        "otp_expiry_minutes": otp_service.otp_expiry_minutes,
+        "max_attempts": otp_service.max_attempts,
+        "sms_provider": otp_service.sms_provider,
+        "twilio_configured": bool(otp_service.twilio_account_sid and otp_service.twilio_auth_token),
+        "textlocal_configured": bool(otp_service.textlocal_api_key)
+    }
+
+
 # Additional endpoint for testing (can be removed in production)
 @router.get("/config")
 async def get_otp_config(
@@ -195,12 +250,7 @@ async def get_otp_config(
         return {
             "success": True,
             "config": {
-                "otp_length": otp_service.otp_length,
-                "otp_expiry_minutes": otp_service.otp_expiry_minutes,
-                "max_attempts": otp_service.max_attempts,
-                "sms_provider": otp_service.sms_provider,
-                "twilio_configured": bool(otp_service.twilio_account_sid and otp_service.twilio_auth_token),
-                "textlocal_configured": bool(otp_service.textlocal_api_key),
+                **_static_otp_config(),
                 "active_otps_count": len(otp_service.otp_storage)
             }
         }
@@ -2,68 +2,167 @@
 Patient services API endpoints
 Handles patient forms, callback requests, FAQ queries, and conversation logging
 """
-import uuid
+import asyncio
+import logging
+import secrets
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
-from fastapi import APIRouter, HTTPException
+from typing import Dict, List, Optional, Any, Tuple, Union
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi.responses import ORJSONResponse
 
 # Import shared models
 from .models import CallbackRequest, SendFormRequest, FAQRequest, ConversationSummaryRequest
 from services.patient_interaction_logger import patient_logger
+from services.keyword_scanner import KeywordScanner
+from services.record_store import RecordStore
 
-router = APIRouter(prefix="/api", tags=["patient-services"])
+router = APIRouter(prefix="/api", tags=["patient-services"], default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
+
+# Interaction records are queued and written to the daily log by a background task while the app is running
+INTERACTION_FLUSH_INTERVAL = 0.5  # seconds
+_interaction_queue: Optional[asyncio.Queue] = None
+
+def _record_interaction(**interaction: Any):
+    """Persist an interaction through patient_logger without blocking the request when the writer is running"""
+    if _interaction_queue is not None:
+        _interaction_queue.put_nowait(interaction)
+    else:
+        patient_logger.log_interaction(**interaction)
+
+def _write_interactions(batch: List[Dict[str, Any]]):
+    for interaction in batch:
+        patient_logger.log_interaction(**interaction)
+
+def _drain(queue: asyncio.Queue) -> List[Dict[str, Any]]:
+    batch = []
+    while not queue.empty():
+        batch.append(queue.get_nowait())
+    return batch
+
+async def _interaction_writer(queue: asyncio.Queue):
+    """Write queued interactions in batches every INTERACTION_FLUSH_INTERVAL"""
+    while True:
+        await asyncio.sleep(INTERACTION_FLUSH_INTERVAL)
+        batch = _drain(queue)
+        if batch:
+            try:
+                await asyncio.to_thread(_write_interactions, batch)
+            except Exception as e:
+                logger.error("Error writing queued interactions: %s", e)
+
+@asynccontextmanager
+async def interaction_log_lifespan():
+    """Run the interaction writer for the lifetime of the app, flushing anything left on shutdown"""
+    global _interaction_queue
+    _interaction_queue = asyncio.Queue()
+    writer = asyncio.create_task(_interaction_writer(_interaction_queue))
+    try:
+        yield
+    finally:
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
+        queue, _interaction_queue = _interaction_queue, None
+        await asyncio.to_thread(_write_interactions, _drain(queue))
+
+# Keyword routing in priority order: the first matched category answers the query
+FAQ_KEYWORDS = (
+    ("clinic_address", ("address", "location", "where", "find")),
+    ("parking_info", ("parking", "park")),
+    ("office_hours", ("hours", "open", "closed", "time")),
+    ("services", ("service", "treatment", "procedure", "do you do")),
+    ("pricing", ("cost", "price", "fee", "how much")),
+    ("doctor_info", ("doctor", "dentist", "who", "staff")),
+)
+
+_KEYWORD_SCANNER = KeywordScanner(FAQ_KEYWORDS)
+
+def _answer_clinic_address(clinic_info: Dict) -> str:
+    return clinic_info.get("address", "Address not available")
+
+def _answer_parking_info(clinic_info: Dict) -> str:
+    return clinic_info.get("parking_info", "Parking information not available")
+
+def _answer_office_hours(clinic_info: Dict) -> str:
+    hours = clinic_info.get("office_hours_detailed", {})
+    hours_text = "\n".join([f"{day}: {time}" for day, time in hours.items()])
+    return f"Our office hours are:\n{hours_text}"
+
+def _answer_services(clinic_info: Dict) -> str:
+    services = clinic_info.get("services_offered_summary", [])
+    services_text = ", ".join(services)
+    return f"We offer the following services: {services_text}"
+
+def _answer_pricing(clinic_info: Dict) -> str:
+    pricing = clinic_info.get("service_pricing", {})
+    pricing_text = "\n".join([f"{service}: {price}" for service, price in pricing.items()])
+    return f"Here are some of our prices:\n{pricing_text}"
+
+def _answer_doctor_info(clinic_info: Dict) -> str:
+    doctors = clinic_info.get("dentist_team", [])
+    return "\n".join([f"{doc['name']} - {doc['working_days_hours']}" for doc in doctors])
+
+# Category -> answer builder
+_ANSWER_BUILDERS = {
+    "clinic_address": _answer_clinic_address,
+    "parking_info": _answer_parking_info,
+    "office_hours": _answer_office_hours,
+    "services": _answer_services,
+    "pricing": _answer_pricing,
+    "doctor_info": _answer_doctor_info,
+}
+
+# Answers depend only on the knowledge base, which main.py loads once at startup,
+# so they are built once per knowledge base object instead of on every query
+_precomputed: Optional[Tuple[Dict, Dict[str, str]]] = None
+
+def _precomputed_answers(knowledge_base: Dict) -> Dict[str, str]:
+    """Return every category answer for this knowledge base, building them on first use"""
+    global _precomputed
+    if _precomputed is None or _precomputed[0] is not knowledge_base:
+        clinic_info = knowledge_base.get("clinic_info", {})
+        answers = {}
+        for category, builder in _ANSWER_BUILDERS.items():
+            try:
+                answers[category] = builder(clinic_info)
+            except (KeyError, TypeError, AttributeError):
+                # Malformed section; leave it to be built (and fail) at query time as before
+                pass
+        _precomputed = (knowledge_base, answers)
+    return _precomputed[1]
 
 def search_knowledge_base(query: str, knowledge_base: Dict) -> tuple[str, str]:
     """Search knowledge base for relevant information"""
-    query_lower = query.lower()
-    clinic_info = knowledge_base.get("clinic_info", {})
-    
-    # Address/Location queries
-    if any(word in query_lower for word in ["address", "location", "where", "find"]):
-        return clinic_info.get("address", "Address not available"), "clinic_address"
-    
-    # Parking queries
-    if any(word in query_lower for word in ["parking", "park"]):
-        return clinic_info.get("parking_info", "Parking information not available"), "parking_info"
-    
-    # Hours queries
-    if any(word in query_lower for word in ["hours", "open", "closed", "time"]):
-        hours = clinic_info.get("office_hours_detailed", {})
-        hours_text = "\n".join([f"{day}: {time}" for day, time in hours.items()])
-        return f"Our office hours are:\n{hours_text}", "office_hours"
-    
-    # Services queries
-    if any(word in query_lower for word in ["service", "treatment", "procedure", "do you do"]):
-        services = clinic_info.get("services_offered_summary", [])
-        services_text = ", ".join(services)
-        return f"We offer the following services: {services_text}", "services"
-    
-    # Pricing queries
-    if any(word in query_lower for word in ["cost", "price", "fee", "how much"]):
-        pricing = clinic_info.get("service_pricing", {})
-        pricing_text = "\n".join([f"{service}: {price}" for service, price in pricing.items()])
-        return f"Here are some of our prices:\n{pricing_text}", "pricing"
-    
-    # Doctor queries
-    if any(word in query_lower for word in ["doctor", "dentist", "who", "staff"]):
-        doctors = clinic_info.get("dentist_team", [])
-        doctor_info = []
-        for doc in doctors:
-            doctor_info.append(f"{doc['name']} - {doc['working_days_hours']}")
-        return "\n".join(doctor_info), "doctor_info"
+    matched = _KEYWORD_SCANNER.match(query.lower())
+    if matched:
+        answers = _precomputed_answers(knowledge_base)
+        for category, _ in FAQ_KEYWORDS:
+            if category in matched:
+                answer = answers.get(category)
+                if answer is None:
+                    answer = _ANSWER_BUILDERS[category](knowledge_base.get("clinic_info", {}))
+                return answer, category
     
     # Default response
     return "I don't have specific information about that. Please call our office for more details.", "general"
 
+# Request fields copied into the runtime records (dumped in one pydantic-core pass, in model field order)
+CALLBACK_RECORD_FIELDS = frozenset(("name", "contact_number", "preferred_callback_time"))
+CONVERSATION_RECORD_FIELDS = frozenset((
+    "summary", "patient_name", "primary_intent", "appointment_details", "outcome", "call_duration", "additional_notes"
+))
+
+# Used when the knowledge base does not configure an intake form link
+DEFAULT_FORM_URL = "https://forms.brightsmile-dental.com/new-patient"
+
 async def send_new_patient_form(request: SendFormRequest, knowledge_base: Dict):
     """Send new patient forms to the provided phone number"""
     
-    form_url = knowledge_base.get("intake_form_url", "https://forms.brightsmile-dental.com/new-patient")
+    form_url = knowledge_base.get("intake_form_url", DEFAULT_FORM_URL)
     
-    print(f"📱 SEND_NEW_PATIENT_FORM:")
-    print(f"   Phone: {request.contact_number}")
-    print(f"   Form URL: {form_url}")
-    print(f"   ✅ [SIMULATION] SMS would be sent!")
+    logger.debug("📱 SEND_NEW_PATIENT_FORM: phone=%s form_url=%s", request.contact_number, form_url)
+    logger.info("📱 [SIMULATION] New patient form SMS would be sent to %s", request.contact_number)
     
     # Log new patient form interaction
     patient_logger.log_interaction(
@@ -83,34 +182,32 @@ async def send_new_patient_form(request: SendFormRequest, knowledge_base: Dict):
         "form_url": form_url
     }
 
-async def log_callback_request(request: CallbackRequest, callback_requests: List):
+async def log_callback_request(request: CallbackRequest, callback_requests: RecordStore):
     """Log a callback request for staff follow-up"""
     
-    print(f"📞 LOG_CALLBACK_REQUEST:")
-    print(f"   Name: {request.name}")
-    print(f"   Phone: {request.contact_number}")
-    print(f"   Preferred Time: {request.preferred_callback_time}")
+    logger.debug("📞 LOG_CALLBACK_REQUEST: name=%s phone=%s preferred_time=%s",
+                 request.name, request.contact_number, request.preferred_callback_time)
+    
+    # One clock read shared by the runtime record and the interaction log
+    now = datetime.now()
     
     # Generate callback ID
-    callback_id = f"CB-{uuid.uuid4().hex[:8].upper()}"
+    callback_id = f"CB-{secrets.token_hex(4).upper()}"
     
     # Store in runtime storage
     callback_record = {
         "callback_id": callback_id,
-        "name": request.name,
-        "contact_number": request.contact_number,
-        "preferred_callback_time": request.preferred_callback_time,
+        **request.model_dump(include=CALLBACK_RECORD_FIELDS),
         "status": "pending",
-        "created_at": datetime.now().isoformat()
+        "created_at": now.isoformat()
     }
     
-    callback_requests.append(callback_record)
+    await callback_requests.append(callback_id, callback_record)
     
-    print(f"   ✅ Callback request logged successfully!")
-    print(f"   📋 Callback ID: {callback_id}")
+    logger.info("📞 Callback request logged: %s", callback_id)
     
     # Log callback request interaction
-    patient_logger.log_interaction(
+    _record_interaction(
         interaction_type="callback",
         patient_name=request.name,
         contact_number=request.contact_number,
@@ -119,7 +216,8 @@ async def log_callback_request(request: CallbackRequest, callback_requests: List
             "callback_id": callback_id,
             "preferred_callback_time": request.preferred_callback_time,
             "status": "pending"
-        }
+        },
+        timestamp=now
     )
     
     return {
@@ -131,14 +229,13 @@ async def log_callback_request(request: CallbackRequest, callback_requests: List
 async def answer_faq_query(request: FAQRequest, knowledge_base: Dict):
     """Answer frequently asked questions using knowledge base"""
     
-    print(f"❓ ANSWER_FAQ_QUERY:")
-    print(f"   Query: {request.query}")
+    logger.debug("❓ ANSWER_FAQ_QUERY: query=%s", request.query)
     
     # Search knowledge base
     answer, source = search_knowledge_base(request.query, knowledge_base)
     
-    print(f"   💡 Answer: {answer}")
-    print(f"   📚 Source: {source}")
+    logger.debug("   💡 Answer: %s", answer)
+    logger.info("❓ FAQ query answered from %s", source)
     
     # Log FAQ interaction
     patient_logger.log_interaction(
@@ -160,45 +257,55 @@ async def answer_faq_query(request: FAQRequest, knowledge_base: Dict):
         "source": source
     }
 
-async def log_conversation_summary(request: ConversationSummaryRequest, conversation_logs: List):
-    """Log a comprehensive summary of the conversation"""
-    
-    print(f"📝 LOG_CONVERSATION_SUMMARY:")
-    if request.summary:
-        print(f"   Summary: {request.summary}")
-    print(f"   Patient: {request.patient_name or 'Unknown'}")
-    print(f"   Primary Intent: {request.primary_intent}")
-    print(f"   Outcome: {request.outcome}")
-    if request.appointment_details:
-        print(f"   Appointment Details: {request.appointment_details}")
-    if request.call_duration:
-        print(f"   Call Duration: {request.call_duration} seconds")
-    if request.additional_notes:
-        print(f"   Notes: {request.additional_notes}")
+async def log_conversation_summary(request: ConversationSummaryRequest, conversation_logs: RecordStore,
+                                   background_tasks: Optional[BackgroundTasks] = None):
+    """Log a comprehensive summary of the conversation
+    
+    With background_tasks the summary is persisted after the response is sent (the caller only needs the ID)
+    """
+    
+    logger.debug("📝 LOG_CONVERSATION_SUMMARY: patient=%s intent=%s outcome=%s duration=%s summary=%s "
+                 "appointment_details=%s notes=%s",
+                 request.patient_name or 'Unknown', request.primary_intent, request.outcome,
+                 request.call_duration, request.summary, request.appointment_details, request.additional_notes)
+    
+    # One clock read shared by the runtime record and the interaction log
+    now = datetime.now()
     
     # Generate summary ID
-    summary_id = f"CONV-{uuid.uuid4().hex[:8].upper()}"
+    summary_id = f"CONV-{secrets.token_hex(4).upper()}"
     
+    if background_tasks is not None:
+        background_tasks.add_task(_persist_conversation_summary, request, conversation_logs, summary_id, now)
+        return {
+            "success": True,
+            "summary_id": summary_id,
+            "message": "Conversation summary accepted for logging"
+        }
+    
+    await _persist_conversation_summary(request, conversation_logs, summary_id, now)
+    return {
+        "success": True,
+        "summary_id": summary_id,
+        "message": "Conversation summary logged successfully"
+    }
+
+async def _persist_conversation_summary(request: ConversationSummaryRequest, conversation_logs: RecordStore,
+                                        summary_id: str, now: datetime):
+    """Store the conversation record and log the interaction"""
     # Store in runtime storage
     conversation_record = {
         "summary_id": summary_id,
-        "summary": request.summary,
-        "patient_name": request.patient_name,
-        "primary_intent": request.primary_intent,
-        "appointment_details": request.appointment_details,
-        "outcome": request.outcome,
-        "call_duration": request.call_duration,
-        "additional_notes": request.additional_notes,
-        "logged_at": datetime.now().isoformat()
+        **request.model_dump(include=CONVERSATION_RECORD_FIELDS),
+        "logged_at": now.isoformat()
     }
     
-    conversation_logs.append(conversation_record)
+    await conversation_logs.append(summary_id, conversation_record)
     
-    print(f"   ✅ Conversation summary logged successfully!")
-    print(f"   📋 Summary ID: {summary_id}")
+    logger.info("📝 Conversation summary logged: %s", summary_id)
     
     # Log conversation summary interaction as misc category
-    patient_logger.log_interaction(
+    _record_interaction(
         interaction_type="misc",
         patient_name=request.patient_name,
         contact_number=None,  # Contact number not available in this API
@@ -209,11 +316,6 @@ async def log_conversation_summary(request: ConversationSummaryRequest, conversa
             "outcome": request.outcome,
             "call_duration": request.call_duration,
             "type": "conversation_summary"
-        }
+        },
+        timestamp=now
     )
-    
-    return {
-        "success": True,
-        "summary_id": summary_id,
-        "message": "Conversation summary logged successfully"
-    }
@@ -2,24 +2,45 @@
 Reporting API endpoints for the patient interaction logging system
 Provides endpoints for configuring reports, viewing statistics, and managing the reporting system
 """
-from datetime import date, datetime, timedelta
-from typing import Dict, List, Optional, Any
+import asyncio
+import re
+from contextlib import asynccontextmanager
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from services.patient_interaction_logger import patient_logger
+from services.patient_interaction_logger import patient_logger, write_report
 from services.auth_service import require_api_key
+from config import (
+    EMAIL_USERNAME, EMAIL_PASSWORD, EMAIL_RECIPIENTS, EMAIL_SMTP_SERVER, EMAIL_SMTP_PORT, DAILY_REPORT_SCHEDULER
+)
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import pytz
-import shutil
+import orjson
 import os
-from dotenv import load_dotenv
+import logging
 
-# Load environment variables from .env file
-load_dotenv()
+router = APIRouter(prefix="/api", tags=["reporting"], default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api", tags=["reporting"])
+EASTERN = pytz.timezone("US/Eastern")
+
+# Sent daily reports are moved here (created once at import)
+REPORT_ARCHIVE_DIR = patient_logger.log_directory / "archive"
+REPORT_ARCHIVE_DIR.mkdir(exist_ok=True)
+
+# Daily interaction log filenames, e.g. interactions_2025_07_30.json
+LOG_FILE_NAME_RE = re.compile(r"^interactions_(\d{4})_(\d{2})_(\d{2})\.json$")
+
+def parse_report_date(value: str) -> date:
+    """Parse a YYYY-MM-DD date; the C fromisoformat handles the canonical form, strptime any looser input"""
+    if len(value) == 10 and value[4] == "-" and value[7] == "-":
+        return date.fromisoformat(value)
+    return datetime.strptime(value, "%Y-%m-%d").date()
 
 class ReportingConfigRequest(BaseModel):
     """Request model for updating reporting configuration"""
@@ -73,11 +94,11 @@ async def configure_reporting(request: ReportingConfigRequest, authenticated: bo
         # Apply configuration updates
         patient_logger.update_config(config_updates)
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "message": "Reporting configuration updated successfully",
             "updated_fields": list(config_updates.keys())
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating configuration: {str(e)}")
@@ -92,10 +113,10 @@ async def get_reporting_config(authenticated: bool = Depends(require_api_key)):
         if "email" in config and "password" in config["email"]:
             config["email"]["password"] = "***MASKED***"
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "config": config
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving configuration: {str(e)}")
@@ -108,7 +129,7 @@ async def generate_manual_report(request: ManualReportRequest, authenticated: bo
         target_date = None
         if request.target_date:
             try:
-                target_date = datetime.strptime(request.target_date, "%Y-%m-%d").date()
+                target_date = parse_report_date(request.target_date)
             except ValueError:
                 raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
         else:
@@ -116,12 +137,12 @@ async def generate_manual_report(request: ManualReportRequest, authenticated: bo
             target_date = date.today() - timedelta(days=1)
         
         # Generate HTML report
-        html_report = patient_logger.generate_daily_report(target_date)
+        html_report = await asyncio.to_thread(patient_logger.generate_daily_report, target_date)
         
         # Send email by default (can be disabled by setting send_email to False)
         if request.send_email:
             try:
-                patient_logger._send_email_report(html_report, target_date)
+                await asyncio.to_thread(patient_logger._send_email_report, html_report, target_date)
                 email_status = "Email sent successfully"
             except Exception as e:
                 email_status = f"Email failed: {str(e)}"
@@ -132,17 +153,16 @@ async def generate_manual_report(request: ManualReportRequest, authenticated: bo
         report_filename = f"manual_report_{target_date.strftime('%Y_%m_%d')}_{datetime.now().strftime('%H%M%S')}.html"
         report_path = patient_logger.log_directory / report_filename
         
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(html_report)
+        report_size = await asyncio.to_thread(write_report, report_path, html_report)
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "message": f"Report generated for {target_date.strftime('%Y-%m-%d')}",
             "report_date": target_date.strftime('%Y-%m-%d'),
             "report_file": str(report_path),
             "email_status": email_status,
-            "report_size": len(html_report)
-        }
+            "report_size": report_size
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating report: {str(e)}")
@@ -154,12 +174,12 @@ async def generate_daily_report_get(authenticated: bool = Depends(require_api_ke
         target_date = date.today()
         
         # Generate HTML report
-        html_report = patient_logger.generate_daily_report(target_date)
+        html_report = await asyncio.to_thread(patient_logger.generate_daily_report, target_date)
         
         # Send email
         email_status = ""
         try:
-            patient_logger._send_email_report(html_report, target_date)
+            await asyncio.to_thread(patient_logger._send_email_report, html_report, target_date)
             email_status = "Email sent successfully"
         except Exception as e:
             email_status = f"Email failed: {str(e)}"
@@ -170,8 +190,7 @@ async def generate_daily_report_get(authenticated: bool = Depends(require_api_ke
         report_filename = f"daily_report_{target_date.strftime('%Y_%m_%d')}_{datetime.now().strftime('%H%M%S')}.html"
         report_path = patient_logger.log_directory / report_filename
         
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(html_report)
+        report_size = await asyncio.to_thread(write_report, report_path, html_report)
         
         response = {
             "success": True,
@@ -179,13 +198,13 @@ async def generate_daily_report_get(authenticated: bool = Depends(require_api_ke
             "report_date": target_date.strftime('%Y-%m-%d'),
             "report_file": str(report_path),
             "email_status": email_status,
-            "report_size": len(html_report)
+            "report_size": report_size
         }
 
         if "failed" in email_status:
              raise HTTPException(status_code=500, detail=response)
 
-        return response
+        return ORJSONResponse(response)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating report: {str(e)}")
@@ -197,45 +216,57 @@ async def get_interaction_statistics(days: Optional[int] = 7, authenticated: boo
         if days < 1 or days > 365:
             raise HTTPException(status_code=400, detail="Days must be between 1 and 365")
         
-        summary = patient_logger.get_interaction_summary(days)
-        return {
+        summary = await asyncio.to_thread(patient_logger.get_interaction_summary, days)
+        return ORJSONResponse({
             "success": True,
             "statistics": summary
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving statistics: {str(e)}")
 
+# Interactions pulled from the log file per worker-thread hop while streaming
+STREAM_BATCH_SIZE = 200
+
+async def _stream_daily_interactions(target_date: str, parsed_date: date) -> AsyncIterator[bytes]:
+    """Yield the daily interactions response as JSON chunks, one log entry at a time"""
+    interactions = patient_logger.iter_daily_interactions(parsed_date)
+    count = 0
+    try:
+        yield b'{"success":true,"date":' + orjson.dumps(target_date) + b',"interactions":['
+        while True:
+            batch = await asyncio.to_thread(list, islice(interactions, STREAM_BATCH_SIZE))
+            if not batch:
+                break
+            for interaction in batch:
+                yield (b"," if count else b"") + orjson.dumps(interaction)
+                count += 1
+        yield b'],"interaction_count":' + str(count).encode() + b"}"
+    finally:
+        interactions.close()
+
 @router.get("/daily_interactions/{target_date}")
 async def get_daily_interactions(target_date: str, authenticated: bool = Depends(require_api_key)):
-    """Get all interactions for a specific date"""
+    """Get all interactions for a specific date (streamed straight from the log file)"""
+    # Parse date
     try:
-        # Parse date
-        try:
-            parsed_date = datetime.strptime(target_date, "%Y-%m-%d").date()
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-        
-        interactions = patient_logger.get_daily_interactions(parsed_date)
-        
-        return {
-            "success": True,
-            "date": target_date,
-            "interaction_count": len(interactions),
-            "interactions": interactions
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error retrieving daily interactions: {str(e)}")
+        parsed_date = parse_report_date(target_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    return StreamingResponse(
+        _stream_daily_interactions(target_date, parsed_date),
+        media_type="application/json"
+    )
 
 @router.get("/interaction_summary")
 async def get_today_summary(authenticated: bool = Depends(require_api_key)):
     """Get a quick summary of today's interactions"""
     try:
-        today_interactions = patient_logger.get_daily_interactions(date.today())
-        stats = patient_logger._calculate_statistics(today_interactions)
+        today_interactions = await asyncio.to_thread(patient_logger.get_daily_interactions, date.today())
+        stats = await asyncio.to_thread(patient_logger._calculate_statistics, today_interactions)
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "date": date.today().strftime('%Y-%m-%d'),
             "summary": {
@@ -247,7 +278,7 @@ async def get_today_summary(authenticated: bool = Depends(require_api_key)):
                 "peak_hour": stats.get('peak_hour'),
                 "peak_hour_count": stats.get('peak_hour_count', 0)
             }
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving today's summary: {str(e)}")
@@ -280,72 +311,75 @@ async def test_email_configuration(authenticated: bool = Depends(require_api_key
         """.format(timestamp=datetime.now().strftime("%B %d, %Y at %I:%M %p"))
         
         # Send test email
-        patient_logger._send_email_report(test_html, date.today())
+        await asyncio.to_thread(patient_logger._send_email_report, test_html, date.today())
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "message": "Test email sent successfully",
             "recipients": patient_logger.config["email"]["recipients"],
             "timestamp": datetime.now().isoformat()
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error sending test email: {str(e)}")
 
+def _scan_log_files() -> List[Tuple[os.DirEntry, date, int]]:
+    """Daily log files in the log directory as (entry, date, size), from a single directory scan"""
+    candidates = []
+    with os.scandir(patient_logger.log_directory) as entries:
+        for entry in entries:
+            # Only exact daily log names are listed; the date comes from the filename
+            match = LOG_FILE_NAME_RE.match(entry.name)
+            if not match:
+                continue
+            try:
+                file_date = date(*map(int, match.groups()))
+            except ValueError:
+                continue
+            candidates.append((entry, file_date, entry.stat().st_size))
+    return candidates
+
 @router.get("/log_files")
 async def list_log_files(authenticated: bool = Depends(require_api_key)):
     """List all available log files"""
     try:
-        log_files = []
-        for file_path in patient_logger.log_directory.glob("*.json"):
-            if file_path.name.startswith("interactions_"):
-                # Extract date from filename
-                date_part = file_path.name.replace("interactions_", "").replace(".json", "")
-                try:
-                    file_date = datetime.strptime(date_part, "%Y_%m_%d").date()
-                    file_size = file_path.stat().st_size
-                    
-                    # Count interactions in file
-                    interactions = patient_logger.get_daily_interactions(file_date)
-                    
-                    log_files.append({
-                        "filename": file_path.name,
-                        "date": file_date.strftime("%Y-%m-%d"),
-                        "size_bytes": file_size,
-                        "interaction_count": len(interactions)
-                    })
-                except ValueError:
-                    continue
+        candidates = await asyncio.to_thread(_scan_log_files)
+        
+        # Count interactions in all files concurrently
+        counts = await asyncio.gather(*(
+            asyncio.to_thread(patient_logger.count_log_entries, entry.path) for entry, _, _ in candidates
+        ))
+        
+        log_files = [
+            {
+                "filename": entry.name,
+                "date": file_date.strftime("%Y-%m-%d"),
+                "size_bytes": size,
+                "interaction_count": count
+            }
+            for (entry, file_date, size), count in zip(candidates, counts)
+        ]
         
         # Sort by date (newest first)
         log_files.sort(key=lambda x: x["date"], reverse=True)
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "log_files": log_files,
             "total_files": len(log_files)
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing log files: {str(e)}")
 
-# Load config from environment variables
-EMAIL_USERNAME = os.getenv("EMAIL_USERNAME")
-EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
-EMAIL_RECIPIENTS = os.getenv("EMAIL_RECIPIENTS")
-EMAIL_SMTP_SERVER = os.getenv("EMAIL_SMTP_SERVER")
-EMAIL_SMTP_PORT = os.getenv("EMAIL_SMTP_PORT")
-
-# Parse recipients from comma-separated string
-recipients_list = [r.strip() for r in EMAIL_RECIPIENTS.split(",") if r.strip()] if EMAIL_RECIPIENTS else []
-
+# Seed the email settings from the environment (read once in config.py)
 patient_logger.update_config({
     "email": {
         "username": EMAIL_USERNAME,
         "password": EMAIL_PASSWORD,
-        "recipients": recipients_list,
+        "recipients": list(EMAIL_RECIPIENTS),
         "smtp_server": EMAIL_SMTP_SERVER,
-        "smtp_port": int(EMAIL_SMTP_PORT) if EMAIL_SMTP_PORT else 587,
+        "smtp_port": EMAIL_SMTP_PORT,
         "use_tls": True,
         "sender_name": "Zenfru AI Assistant"
     },
@@ -356,30 +390,55 @@ patient_logger.update_config({
     }
 })
 
-async def send_and_archive_daily_report():
-    """Send daily report in US morning, archive after sending, rotate to next day."""
-    tz = pytz.timezone("US/Eastern")
-    now = datetime.now(tz)
-    send_time = patient_logger.config["reporting"].get("daily_email_time", "08:00")
-    send_hour, send_minute = map(int, send_time.split(":"))
-    if now.hour == send_hour and now.minute < 10:  # Run in first 10 min of hour
-        today = now.date()
-        html_report = patient_logger.generate_daily_report(today)
+async def send_and_archive_daily_report(today: Optional[date] = None):
+    """Send the daily report, archive it after sending, and rotate to the next day."""
+    if today is None:
+        today = datetime.now(EASTERN).date()
+    html_report = await asyncio.to_thread(patient_logger.generate_daily_report, today)
+    try:
+        await asyncio.to_thread(patient_logger._send_email_report, html_report, today)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error sending daily report: {str(e)}")
+    # Archive report
+    report_filename = f"daily_report_{today.strftime('%Y_%m_%d')}.html"
+    report_path = patient_logger.log_directory / report_filename
+    await asyncio.to_thread(write_report, report_path, html_report)
+    # Same filesystem, so this is a single atomic rename
+    os.replace(report_path, REPORT_ARCHIVE_DIR / report_filename)
+    # Rotate to next day (clear or create new file)
+    next_day = today + timedelta(days=1)
+    next_report_path = patient_logger.log_directory / f"daily_report_{next_day.strftime('%Y_%m_%d')}.html"
+    try:
+        os.close(os.open(next_report_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+    except FileExistsError:
+        pass
+
+def seconds_until_next_report(now: datetime) -> float:
+    """Seconds from now (Eastern) until the configured daily send time, DST-aware"""
+    send_time = time(*patient_logger.daily_send_time())
+    next_send = EASTERN.localize(datetime.combine(now.date(), send_time))
+    if next_send <= now:
+        next_send = EASTERN.localize(datetime.combine(now.date() + timedelta(days=1), send_time))
+    return (next_send - now).total_seconds()
+
+async def _daily_report_scheduler():
+    """Sleep until the send time, send once, repeat"""
+    while True:
+        await asyncio.sleep(seconds_until_next_report(datetime.now(EASTERN)))
         try:
-            patient_logger._send_email_report(html_report, today)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error sending daily report: {str(e)}")
-        # Archive report
-        archive_dir = patient_logger.log_directory / "archive"
-        archive_dir.mkdir(exist_ok=True)
-        report_filename = f"daily_report_{today.strftime('%Y_%m_%d')}.html"
-        report_path = patient_logger.log_directory / report_filename
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(html_report)
-        shutil.move(str(report_path), str(archive_dir / report_filename))
-        # Rotate to next day (clear or create new file)
-        next_day = today + timedelta(days=1)
-        next_report_path = patient_logger.log_directory / f"daily_report_{next_day.strftime('%Y_%m_%d')}.html"
-        if not next_report_path.exists():
-            with open(next_report_path, 'w', encoding='utf-8') as f:
-                f.write("")
+            await send_and_archive_daily_report()
+        except Exception:
+            logger.exception("❌ Scheduled daily report failed")
+
+@asynccontextmanager
+async def daily_report_lifespan():
+    """Run the daily report scheduler for the lifetime of the app when DAILY_REPORT_SCHEDULER is on"""
+    if not DAILY_REPORT_SCHEDULER:
+        yield
+        return
+    scheduler = asyncio.create_task(_daily_report_scheduler())
+    try:
+        yield
+    finally:
+        scheduler.cancel()
+        await asyncio.gather(scheduler, return_exceptions=True)
@@ -1,29 +1,31 @@
+import asyncio
 import json
-import requests
-import os
-from datetime import datetime, timedelta
+import re
+import ijson
+import orjson
+from datetime import date, datetime, timedelta, time as dt_time
 from typing import Dict, Any, Optional, List
 from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict
+from config import KOLLA_BASE_URL
 from pathlib import Path
 from .models import RescheduleRequest
+from .get_contact_api import get_kolla_client
 from services.patient_interaction_logger import patient_logger
 from services.auth_service import require_api_key
-
-# Load environment variables
-load_dotenv()
+from services.ttl_cache import TTLCache
 
 router = APIRouter(prefix="/api", tags=["reschedule"])
 
-# Kolla API configuration
-KOLLA_BASE_URL = os.getenv("KOLLA_BASE_URL", "https://unify.kolla.dev/dental/v1")
-KOLLA_HEADERS = {
-    "accept": "application/json",
-    "authorization": f"Bearer {os.getenv('KOLLA_BEARER_TOKEN')}",
-    "connector-id": os.getenv("KOLLA_CONNECTOR_ID", "eaglesoft"),
-    "consumer-id": os.getenv("KOLLA_CONSUMER_ID", "dajc")
-}
+# Characters stripped when normalizing a phone number
+_PHONE_STRIP = str.maketrans("", "", " -()")
+
+# Latest appointment ID per normalized phone; the short TTL covers agent retries within one call
+APPOINTMENT_LOOKUP_TTL_SECONDS = 30
+_appointment_by_phone = TTLCache(maxsize=2048, ttl=APPOINTMENT_LOOKUP_TTL_SECONDS)
+
+# Phone lookups currently in flight, so concurrent callers share one pair of Kolla requests
+_appointment_lookups: Dict[str, asyncio.Task] = {}
 
 # Doctor and Hygienist to Provider ID mappings
 DOCTOR_PROVIDER_MAPPING = {
@@ -80,6 +82,20 @@ OPERATORY_REMOTE_ID_MAPPING = {
     "resources/operatory_13": "13",
 }
 
+# Fixed parts of the payload for the replacement appointment
+RESCHEDULE_SCHEDULER = {
+    "name": "",
+    "remote_id": "HO7",
+    "type": "",
+    "display_name": ""
+}
+DEFAULT_OPERATORY_RESOURCE = {
+    "name": "resources/operatory_7",  # Default to operatory_7
+    "remote_id": "7",
+    "type": "operatory",
+    "display_name": "Operatory 7"
+}
+
 def get_provider_and_operatory_from_doctor_name(doctor_name: str) -> Dict[str, Any]:
     """
     Get provider ID and operatory information based on doctor/hygienist name
@@ -144,7 +160,7 @@ def get_provider_and_operatory_from_doctor_name(doctor_name: str) -> Dict[str, A
         }
 
 async def get_contact_by_phone_filter(patient_phone: str) -> Optional[Dict[str, Any]]:
-    """Fetch contact information from Kolla API using phone filter"""
+    """Fetch contact information from Kolla API using phone filter, decoding only the first match"""
     try:
         contacts_url = f"{KOLLA_BASE_URL}/contacts"
         
@@ -158,17 +174,21 @@ async def get_contact_by_phone_filter(patient_phone: str) -> Optional[Dict[str,
         print(f"   Filter: {filter_query}")
         print(f"   Normalized phone: {patient_phone}")
         
-        response = requests.get(contacts_url, headers=KOLLA_HEADERS, params=params, timeout=10)
-        print(f"   Response Status: {response.status_code}")
-        
-        if response.status_code != 200:
-            print(f"   ❌ API Error: {response.text}")
-            return None
+        async with get_kolla_client().stream("GET", contacts_url, params=params) as response:
+            print(f"   Response Status: {response.status_code}")
             
-        contacts_data = response.json()
-        contacts = contacts_data.get("contacts", [])
-        
-        print(f"   ✅ Found {len(contacts)} contacts matching phone filter")
+            if response.status_code != 200:
+                await response.aread()
+                print(f"   ❌ API Error: {response.text}")
+                return None
+            
+            # Stop parsing once the first contact is complete, but read the body to the end
+            # so the shared client can reuse the connection
+            contacts = ijson.sendable_list()
+            parser = ijson.items_coro(contacts, "contacts.item", use_float=True)
+            async for chunk in response.aiter_bytes():
+                if not contacts:
+                    parser.send(chunk)
         
         if contacts:
             # Return the first matching contact
@@ -183,8 +203,8 @@ async def get_contact_by_phone_filter(patient_phone: str) -> Optional[Dict[str,
         print(f"   ❌ Error fetching contact by phone filter: {e}")
         return None
 
-async def get_appointments_by_contact_filter(contact_id: str) -> List[Dict[str, Any]]:
-    """Get appointments for a specific contact using appointments filter"""
+async def get_latest_appointment_by_contact_filter(contact_id: str) -> Optional[Dict[str, Any]]:
+    """Get the latest scheduled appointment for a contact; Kolla applies the contact/state filter server-side"""
     try:
         appointments_url = f"{KOLLA_BASE_URL}/appointments"
         
@@ -196,37 +216,56 @@ async def get_appointments_by_contact_filter(contact_id: str) -> List[Dict[str,
         print(f"📅 Calling Kolla API: {appointments_url}")
         print(f"   Filter: {filter_query}")
         
-        response = requests.get(appointments_url, headers=KOLLA_HEADERS, params=params, timeout=10)
+        response = await get_kolla_client().get(appointments_url, params=params)
         print(f"   Response Status: {response.status_code}")
         
         if response.status_code != 200:
             print(f"   ❌ API Error: {response.text}")
-            return []
+            return None
             
-        appointments_data = response.json()
-        appointments = appointments_data.get("appointments", [])
+        appointments = orjson.loads(response.content).get("appointments", [])
         
         print(f"   ✅ Found {len(appointments)} appointments for contact: {contact_id}")
         
-        # Sort by start_time descending to get latest appointments first
-        if appointments:
-            appointments.sort(key=lambda x: x.get("start_time", ""), reverse=True)
-        
-        return appointments
+        # Only the latest is needed, so take the max start_time instead of sorting the list
+        return max(appointments, key=lambda x: x.get("start_time", ""), default=None)
         
     except Exception as e:
         print(f"   ❌ Error fetching appointments by contact filter: {e}")
-        return []
+        return None
 
 async def find_appointment_by_phone(phone_number: str) -> Optional[str]:
     """
     Find the latest appointment for a patient by phone number using Kolla API filters.
     Returns appointment_id if found, None otherwise.
     """
+    # Normalize phone number to standard format (e.g., "5551234567")
+    normalized_phone = phone_number.translate(_PHONE_STRIP)
+    
+    cached = _appointment_by_phone.get(normalized_phone)
+    if cached is not None:
+        print(f"🔍 Using cached appointment for phone: {normalized_phone} -> {cached}")
+        return cached
+    
+    task = _appointment_lookups.get(normalized_phone)
+    if task is None:
+        task = asyncio.create_task(_lookup_latest_appointment(phone_number, normalized_phone))
+        _appointment_lookups[normalized_phone] = task
+        task.add_done_callback(lambda _: _appointment_lookups.pop(normalized_phone, None))
+    # Shield so one caller disconnecting does not cancel the lookup for the others
+    return await asyncio.shield(task)
+
+async def find_appointments_by_phones(phone_numbers: List[str]) -> Dict[str, Optional[str]]:
+    """
+    Find the latest appointment for several patients at once.
+    Lookups run concurrently on the shared Kolla client; returns {phone_number: appointment_id or None}.
+    """
+    appointment_ids = await asyncio.gather(*(find_appointment_by_phone(phone) for phone in phone_numbers))
+    return dict(zip(phone_numbers, appointment_ids))
+
+async def _lookup_latest_appointment(phone_number: str, normalized_phone: str) -> Optional[str]:
+    """Query Kolla for the contact and its latest scheduled appointment, caching a hit"""
     try:
-        # Normalize phone number to standard format (e.g., "5551234567")
-        normalized_phone = phone_number.replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
-        
         print(f"🔍 Finding appointment for phone: {phone_number} (normalized: {normalized_phone})")
         
         # Step 1: Find contact by phone using filter
@@ -245,28 +284,28 @@ async def find_appointment_by_phone(phone_number: str) -> Optional[str]:
         
         print(f"   📋 Found contact: {contact_info.get('given_name', '')} {contact_info.get('family_name', '')} ({contact_id})")
         
-        # Step 3: Get appointments for this contact using filter
-        appointments = await get_appointments_by_contact_filter(contact_id)
+        # Step 3: Get the latest appointment for this contact using filter
+        latest_appointment = await get_latest_appointment_by_contact_filter(contact_id)
         
-        if not appointments:
+        if not latest_appointment:
             print(f"   ⚠️ No appointments found for contact: {contact_id}")
             return None
         
-        # Step 4: Get the latest appointment (already sorted by start_time desc)
-        latest_appointment = appointments[0]
         appointment_id = latest_appointment.get("name")  # This is the appointment ID
         
         print(f"   ✅ Found latest appointment: {appointment_id}")
         
+        if appointment_id:
+            _appointment_by_phone.set(normalized_phone, appointment_id)
         return appointment_id
         
     except Exception as e:
         print(f"   ❌ Error finding appointment by phone: {e}")
         return None
 
-from pydantic import Extra
-
 class FlexibleRescheduleRequest(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
     appointment_id: str
     date: Optional[str] = None
     start_time: Optional[str] = None
@@ -274,10 +313,9 @@ class FlexibleRescheduleRequest(BaseModel):
     notes: Optional[str] = None
     new_doctor: Optional[str] = None  # New field for specifying doctor
 
-    class Config:
-        extra = Extra.allow
-
 class RescheduleByPhoneRequest(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
     phone: str
     date: Optional[str] = None
     start_time: Optional[str] = None
@@ -285,9 +323,6 @@ class RescheduleByPhoneRequest(BaseModel):
     notes: Optional[str] = None
     new_doctor: Optional[str] = None  # New field for specifying doctor
 
-    class Config:
-        extra = Extra.allow
-
 @router.post("/reschedule_by_phone")
 async def reschedule_by_phone(request: RescheduleByPhoneRequest, authenticated: bool = Depends(require_api_key)):
     """
@@ -304,7 +339,7 @@ async def reschedule_by_phone(request: RescheduleByPhoneRequest, authenticated:
         print(f"   Notes: {request.notes}")
         
         # Normalize phone number
-        normalized_phone = request.phone.replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
+        normalized_phone = request.phone.translate(_PHONE_STRIP)
         
         # Find the latest appointment for this phone number
         appointment_id = await find_appointment_by_phone(normalized_phone)
@@ -373,7 +408,7 @@ async def get_appointment_details(appointment_id: str) -> Optional[Dict[str, Any
         url = f"{KOLLA_BASE_URL}/appointments/{appointment_id}"
         print(f"📋 Fetching appointment details: {url}")
         
-        response = requests.get(url, headers=KOLLA_HEADERS, timeout=10)
+        response = await get_kolla_client().get(url)
         print(f"   Response Status: {response.status_code}")
         
         if response.status_code != 200:
@@ -391,7 +426,7 @@ async def get_appointment_details(appointment_id: str) -> Optional[Dict[str, Any
 async def cancel_appointment(appointment_id: str) -> bool:
     """Cancel an appointment using Kolla API"""
     try:
-        url = f"{KOLLA_BASE_URL}/appointments/{appointment_id}:cancel"
+        url = f"/appointments/{appointment_id}:cancel"
         
         # Prepare cancellation payload as per EagleSoft requirements
         cancel_payload = {
@@ -406,7 +441,7 @@ async def cancel_appointment(appointment_id: str) -> bool:
         print(f"❌ Cancelling appointment: {url}")
         print(f"   Payload: {cancel_payload}")
         
-        response = requests.post(url, headers=KOLLA_HEADERS, json=cancel_payload, timeout=10)
+        response = await get_kolla_client().post(url, json=cancel_payload)
         print(f"   Response status: {response.status_code}")
         print(f"   Response text: {response.text}")
         
@@ -602,7 +637,7 @@ async def reschedule_patient_appointment(request: FlexibleRescheduleRequest, aut
         elif original_date != request.date:
             # Different date but no specific doctor - get doctor scheduled for new date
             print(f"   🔄 Different date detected - looking up doctor for {request.date}")
-            doctor_info = get_doctor_for_date(request.date)
+            doctor_info = await asyncio.to_thread(get_doctor_for_date, request.date)
             
             if doctor_info:
                 print(f"   👨‍⚕️ Updating provider for new date: {doctor_info['name']} (ID: {doctor_info['provider_id']})")
@@ -641,6 +676,9 @@ async def reschedule_patient_appointment(request: FlexibleRescheduleRequest, aut
                 "message": f"Failed to cancel original appointment {appointment_id}",
                 "status": "cancel_failed"
             }
+        
+        # The cancelled appointment may be cached as some phone's latest; reschedules are rare, so drop them all
+        _appointment_by_phone.clear()
 
         # Step 3: Create new appointment with the new time details
         print(f"📅 Step 3: Creating new appointment with updated details...")
@@ -664,12 +702,7 @@ async def reschedule_patient_appointment(request: FlexibleRescheduleRequest, aut
             "wall_end_time": wall_end_time,
             "providers": updated_providers,  # Use updated providers
             "appointment_type_id": "appointmenttypes/1",
-            "scheduler": {
-                "name": "",
-                "remote_id": "HO7",
-                "type": "",
-                "display_name": ""
-            },
+            "scheduler": RESCHEDULE_SCHEDULER,
             "short_description": request.notes or "Rescheduled appointment",
             "notes": original_notes,
             "additional_data": original_appointment.get("additional_data", {})
@@ -684,21 +717,15 @@ async def reschedule_patient_appointment(request: FlexibleRescheduleRequest, aut
         else:
             # If no operatory specified, create a default operatory resource
             print(f"   ⚠️ No operatory found, creating default operatory resource")
-            default_operatory_resource = {
-                "name": "resources/operatory_7",  # Default to operatory_7
-                "remote_id": "7",
-                "type": "operatory",
-                "display_name": "Operatory 7"
-            }
             
             # Add to resources if not already present
             if not updated_resources:
-                new_appointment_data["resources"] = [default_operatory_resource]
+                new_appointment_data["resources"] = [DEFAULT_OPERATORY_RESOURCE]
             else:
                 # Check if there's already an operatory resource
                 has_operatory = any(res.get("type") == "operatory" for res in updated_resources)
                 if not has_operatory:
-                    new_appointment_data["resources"] = updated_resources + [default_operatory_resource]
+                    new_appointment_data["resources"] = updated_resources + [DEFAULT_OPERATORY_RESOURCE]
                 else:
                     new_appointment_data["resources"] = updated_resources
 
@@ -709,8 +736,7 @@ async def reschedule_patient_appointment(request: FlexibleRescheduleRequest, aut
         print(f"   Notes: {request.notes}")
 
         # Create the new appointment
-        url = f"{KOLLA_BASE_URL}/appointments"
-        response = requests.post(url, headers=KOLLA_HEADERS, json=new_appointment_data, timeout=10)
+        response = await get_kolla_client().post("/appointments", json=new_appointment_data)
         print(f"   Response status: {response.status_code}")
         print(f"   Response text: {response.text}")
         
@@ -734,7 +760,7 @@ async def reschedule_patient_appointment(request: FlexibleRescheduleRequest, aut
             if request.new_doctor:
                 reschedule_note = f"Rescheduled to {request.date} at {request.start_time}-{request.end_time} with {request.new_doctor}"
             elif original_date != request.date:
-                doctor_info = get_doctor_for_date(request.date)
+                doctor_info = await asyncio.to_thread(get_doctor_for_date, request.date)
                 doctor_name = doctor_info['name'] if doctor_info else f"Provider {updated_providers[0].get('remote_id', 'Unknown')}"
                 reschedule_note = f"Rescheduled from {original_date} to {request.date} at {request.start_time}-{request.end_time} with {doctor_name}"
             else:
@@ -917,37 +943,52 @@ async def reschedule_patient_appointment(request: FlexibleRescheduleRequest, aut
             "error": str(e)
         }
 
+# Accepted input formats, tried in order after the ISO fast path
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y")
+TIME_FORMATS = ("%H:%M:%S", "%H:%M", "%I:%M %p", "%I:%M:%S %p")
+# Inputs the C fromisoformat parsers handle identically to the first strptime formats
+ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+ISO_TIME_RE = re.compile(r"\d{2}:\d{2}(?::\d{2})?")
+
+def _parse_date(date_str: str) -> Optional[date]:
+    """Parse a date in any of DATE_FORMATS"""
+    if ISO_DATE_RE.fullmatch(date_str):
+        try:
+            return date.fromisoformat(date_str)
+        except ValueError:
+            return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def _parse_time(time_str: str) -> Optional[dt_time]:
+    """Parse a time in any of TIME_FORMATS"""
+    if ISO_TIME_RE.fullmatch(time_str):
+        try:
+            return dt_time.fromisoformat(time_str)
+        except ValueError:
+            return None
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(time_str, fmt).time()
+        except ValueError:
+            continue
+    return None
+
 def combine_date_time(date_str: str, time_str: str) -> Optional[str]:
     """
     Combine separate date and time strings into ISO format.
     """
     try:
-        # Parse date
-        date_formats = ["%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y"]
-        date_obj = None
-        
-        for fmt in date_formats:
-            try:
-                date_obj = datetime.strptime(date_str, fmt).date()
-                break
-            except ValueError:
-                continue
-        
+        date_obj = _parse_date(date_str)
         if not date_obj:
             return None
         
-        # Parse time
-        time_formats = ["%H:%M:%S", "%H:%M", "%I:%M %p", "%I:%M:%S %p"]
-        time_obj = None
-        
-        for fmt in time_formats:
-            try:
-                time_obj = datetime.strptime(time_str, fmt).time()
-                break
-            except ValueError:
-                continue
-        
-        if not time_obj:
+        time_obj = _parse_time(time_str)
+        if time_obj is None:
             return None
         
         # Combine and return ISO format
@@ -963,32 +1004,12 @@ def combine_date_time_to_wall(date_str: str, time_str: str) -> Optional[str]:
     Returns format: "YYYY-MM-DD HH:MM:SS"
     """
     try:
-        # Parse date
-        date_formats = ["%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y"]
-        date_obj = None
-        
-        for fmt in date_formats:
-            try:
-                date_obj = datetime.strptime(date_str, fmt).date()
-                break
-            except ValueError:
-                continue
-        
+        date_obj = _parse_date(date_str)
         if not date_obj:
             return None
         
-        # Parse time
-        time_formats = ["%H:%M:%S", "%H:%M", "%I:%M %p", "%I:%M:%S %p"]
-        time_obj = None
-        
-        for fmt in time_formats:
-            try:
-                time_obj = datetime.strptime(time_str, fmt).time()
-                break
-            except ValueError:
-                continue
-        
-        if not time_obj:
+        time_obj = _parse_time(time_str)
+        if time_obj is None:
             return None
         
         # Combine and return wall time format
@@ -1014,7 +1035,7 @@ async def fetch_patient_details_by_contact_id(contact_id: str) -> Dict[str, Any]
         
         print(f"📞 Fetching patient details from: {contacts_url}")
         
-        response = requests.get(contacts_url, headers=KOLLA_HEADERS, timeout=10)
+        response = await get_kolla_client().get(contacts_url)
         print(f"   Response Status: {response.status_code}")
         
         if response.status_code != 200:
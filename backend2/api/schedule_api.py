@@ -4,27 +4,14 @@ Handles availability checking for appointment booking
 Simplified version using static schedule.json and direct Kolla API calls
 """
 import json
-import os
 import requests
 from datetime import datetime, timedelta
 from pathlib import Path
 from fastapi import APIRouter
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from config import KOLLA_BASE_URL, KOLLA_HEADERS
 
 router = APIRouter(prefix="/api", tags=["schedule"])
 
-# Kolla API configuration
-KOLLA_BASE_URL = os.getenv("KOLLA_BASE_URL", "https://unify.kolla.dev/dental/v1")
-KOLLA_HEADERS = {
-    "accept": "application/json",
-    "authorization": f"Bearer {os.getenv('KOLLA_BEARER_TOKEN')}",
-    "connector-id": os.getenv("KOLLA_CONNECTOR_ID", "eaglesoft"),
-    "consumer-id": os.getenv("KOLLA_CONSUMER_ID", "dajc")
-}
-
 # Provider ID mappings
 DOCTOR_PROVIDER_MAPPING = {
     "Dr. Yuzvyak": "100",
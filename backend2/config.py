@@ -0,0 +1,48 @@
+"""
+Shared configuration for the backend
+Loads .env once per process and exposes Kolla, Twilio, report email and debug settings as module constants
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Kolla API configuration
+KOLLA_BASE_URL = os.getenv("KOLLA_BASE_URL", "https://unify.kolla.dev/dental/v1")
+KOLLA_BEARER_TOKEN = os.getenv("KOLLA_BEARER_TOKEN")
+KOLLA_CONNECTOR_ID = os.getenv("KOLLA_CONNECTOR_ID", "eaglesoft")
+KOLLA_CONSUMER_ID = os.getenv("KOLLA_CONSUMER_ID", "dajc")
+
+KOLLA_HEADERS = {
+    "accept": "application/json",
+    "authorization": f"Bearer {KOLLA_BEARER_TOKEN}",
+    "connector-id": KOLLA_CONNECTOR_ID,
+    "consumer-id": KOLLA_CONSUMER_ID
+}
+
+# Comma-separated API keys accepted by the auth service
+API_KEYS = os.getenv("API_KEYS", "")
+
+# Twilio configuration (SMS is simulated when these are not set)
+TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
+
+# Real new patient form texts; off by default so the form link is only simulated even when Twilio is configured for OTP
+NEW_PATIENT_FORM_SMS_ENABLED = os.getenv("NEW_PATIENT_FORM_SMS_ENABLED", "false").lower() == "true"
+
+# Report email configuration (recipients is a comma-separated list)
+EMAIL_USERNAME = os.getenv("EMAIL_USERNAME")
+EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
+EMAIL_RECIPIENTS = tuple(r.strip() for r in os.getenv("EMAIL_RECIPIENTS", "").split(",") if r.strip())
+EMAIL_SMTP_SERVER = os.getenv("EMAIL_SMTP_SERVER")
+EMAIL_SMTP_PORT = int(os.getenv("EMAIL_SMTP_PORT") or 587)
+
+# In-process daily report send at the configured time; off by default since reports are triggered by an external cron
+DAILY_REPORT_SCHEDULER = os.getenv("DAILY_REPORT_SCHEDULER", "false").lower() == "true"
+
+# Error details (exception text) are only returned to clients in debug; defaults on outside Render
+IS_RENDER = os.getenv("RENDER", "false").lower() == "true"
+DEBUG = os.getenv("DEBUG", str(not IS_RENDER)).lower() == "true"
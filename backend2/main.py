@@ -8,19 +8,25 @@ import json
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Depends
 from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 import os
 from pathlib import Path
 import logging
+import queue
+import atexit
+from logging.handlers import QueueHandler, QueueListener
+from contextlib import asynccontextmanager
 from services.service_status_sheet import update_fastapi_backend
 
 # Import services
 from services.getkolla_service import GetKollaService
 from services.availability_service import AvailabilityService
 from services.patient_interaction_logger import patient_logger
+from services.record_store import RecordStore, callback_store, conversation_store
 from services.supabase_log_handler import SupabaseLogHandler
 from services.auth_service import require_api_key
 
@@ -57,10 +63,16 @@ def setup_logging():
     if os.getenv("RENDER", "false").lower() == "true":
         handler = SupabaseLogHandler()
         formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
     else:
-        logging.basicConfig(level=logging.INFO)
+        handler = logging.StreamHandler()
+        formatter = logging.Formatter(logging.BASIC_FORMAT)
+    handler.setFormatter(formatter)
+    # Emit from a background thread so request handlers never block on stdout or the Supabase POST
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
 
 setup_logging()
 
@@ -93,8 +105,6 @@ logging.info(f"   Knowledge Base: {len(KNOWLEDGE_BASE)} sections loaded")
 
 # Runtime storage for testing (not persistent)
 APPOINTMENTS = []
-CALLBACK_REQUESTS = []
-CONVERSATION_LOGS = []
 
 # ========== DEPENDENCY PROVIDERS ==========
 
@@ -114,20 +124,28 @@ def get_knowledge_base() -> Dict:
     """Dependency provider for knowledge base data"""
     return KNOWLEDGE_BASE
 
-def get_callback_requests() -> List:
-    """Dependency provider for callback requests storage"""
-    return CALLBACK_REQUESTS
+def get_callback_requests() -> RecordStore:
+    """Dependency provider for callback requests storage (shared by all workers)"""
+    return callback_store
 
-def get_conversation_logs() -> List:
-    """Dependency provider for conversation logs storage"""
-    return CONVERSATION_LOGS
+def get_conversation_logs() -> RecordStore:
+    """Dependency provider for conversation logs storage (shared by all workers)"""
+    return conversation_store
 
 # ========== FASTAPI APP ==========
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared outbound clients and background workers on startup and close them on shutdown"""
+    async with get_contact_api.kolla_client_lifespan(), new_patient_form_api.sms_client_lifespan(), \
+            patient_services_api.interaction_log_lifespan(), reporting_api.daily_report_lifespan():
+        yield
+
 app = FastAPI(
     title="BrightSmile Dental AI Assistant - Modular Backend",
     description="Modular backend using actual JSON files with console logging",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # Mount the directory containing the logo as a static directory
@@ -190,7 +208,7 @@ def create_booking_endpoints():
 def create_patient_services_endpoints():
     """Create patient services endpoints with proper dependency injection"""
     
-    @app.post("/api/send_new_patient_form", tags=["patient-services"])
+    @app.post("/api/send_new_patient_form", tags=["patient-services"], response_class=ORJSONResponse)
     async def send_new_patient_form(
         request: patient_services_api.SendFormRequest,
         knowledge_base: Dict = Depends(get_knowledge_base),
@@ -199,16 +217,16 @@ def create_patient_services_endpoints():
         """Send new patient forms to the provided phone number"""
         return await patient_services_api.send_new_patient_form(request, knowledge_base)
     
-    @app.post("/api/log_callback_request", tags=["patient-services"])
+    @app.post("/api/log_callback_request", tags=["patient-services"], response_class=ORJSONResponse)
     async def log_callback_request(
         request: patient_services_api.CallbackRequest,
-        callback_requests: List = Depends(get_callback_requests),
+        callback_requests: RecordStore = Depends(get_callback_requests),
         authenticated: bool = Depends(require_api_key)
     ):
         """Log a callback request for staff follow-up"""
         return await patient_services_api.log_callback_request(request, callback_requests)
     
-    @app.post("/api/answer_faq_query", tags=["patient-services"])
+    @app.post("/api/answer_faq_query", tags=["patient-services"], response_class=ORJSONResponse)
     async def answer_faq_query(
         request: patient_services_api.FAQRequest,
         knowledge_base: Dict = Depends(get_knowledge_base),
@@ -217,14 +235,15 @@ def create_patient_services_endpoints():
         """Answer frequently asked questions using knowledge base"""
         return await patient_services_api.answer_faq_query(request, knowledge_base)
     
-    @app.post("/api/log_conversation_summary", tags=["patient-services"])
+    @app.post("/api/log_conversation_summary", tags=["patient-services"], response_class=ORJSONResponse, status_code=202)
     async def log_conversation_summary(
         request: patient_services_api.ConversationSummaryRequest,
-        conversation_logs: List = Depends(get_conversation_logs),
+        background_tasks: BackgroundTasks,
+        conversation_logs: RecordStore = Depends(get_conversation_logs),
         authenticated: bool = Depends(require_api_key)
     ):
-        """Log a comprehensive summary of the conversation"""
-        return await patient_services_api.log_conversation_summary(request, conversation_logs)
+        """Accept a conversation summary; it is persisted after the response is sent"""
+        return await patient_services_api.log_conversation_summary(request, conversation_logs, background_tasks)
 
 def create_debug_endpoints():
     """Create debug endpoints with proper dependency injection"""
@@ -255,12 +274,12 @@ def create_debug_endpoints():
         return await debug_api.get_debug_schedule(schedule, bookings)
     
     @app.get("/api/debug/callbacks", tags=["debug"])
-    async def get_debug_callbacks(callback_requests: List = Depends(get_callback_requests), authenticated: bool = Depends(require_api_key)):
+    async def get_debug_callbacks(callback_requests: RecordStore = Depends(get_callback_requests), authenticated: bool = Depends(require_api_key)):
         """Debug endpoint to view all callback requests"""
         return await debug_api.get_debug_callbacks(callback_requests)
     
     @app.get("/api/debug/conversations", tags=["debug"])
-    async def get_debug_conversations(conversation_logs: List = Depends(get_conversation_logs), authenticated: bool = Depends(require_api_key)):
+    async def get_debug_conversations(conversation_logs: RecordStore = Depends(get_conversation_logs), authenticated: bool = Depends(require_api_key)):
         """Debug endpoint to view all conversation logs"""
         return await debug_api.get_debug_conversations(conversation_logs)
     
@@ -374,4 +393,5 @@ if __name__ == "__main__":
     logging.info("")
     
     port = int(os.environ.get("PORT", 8000))  # default to 8000 locally
+    # uvicorn's "auto" loop/http pick uvloop + httptools (from uvicorn[standard]) when installed
     uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
@@ -2,16 +2,13 @@
 Authentication service for API key validation
 """
 
-import os
 from typing import List, Optional
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import secrets
 import logging
 
-# Load environment variables
-from dotenv import load_dotenv
-load_dotenv()
+from config import API_KEYS
 
 class AuthService:
     """Service for handling API key authentication"""
@@ -23,7 +20,7 @@ class AuthService:
     
     def _load_api_keys(self) -> List[str]:
         """Load API keys from environment variables"""
-        keys_str = os.getenv("API_KEYS", "")
+        keys_str = API_KEYS
         if not keys_str:
             # Generate a default key for development if none provided
             default_key = secrets.token_urlsafe(32)
@@ -84,8 +81,8 @@ class AuthService:
 # Global auth service instance
 auth_service = AuthService()
 
-# FastAPI dependency for authentication
-def require_api_key(credentials: HTTPAuthorizationCredentials = Security(HTTPBearer())) -> bool:
+# FastAPI dependency for authentication (async because it does no I/O, so FastAPI skips the threadpool hop)
+async def require_api_key(credentials: HTTPAuthorizationCredentials = Security(HTTPBearer())) -> bool:
     """FastAPI dependency that requires valid API key authentication"""
     return auth_service.verify_token(credentials)
 
@@ -3,15 +3,15 @@ DOB (Date of Birth) Verification Service
 Verifies patient date of birth against Kolla API for personal information access
 """
 
-import os
+import asyncio
 import requests
+import ijson
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 from typing import Optional, Tuple, Dict, Any
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from config import KOLLA_BASE_URL, KOLLA_HEADERS
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +19,18 @@ class DOBVerificationService:
     """Service for verifying patient DOB against Kolla API"""
     
     def __init__(self):
-        # Kolla API configuration
-        self.base_url = os.getenv("KOLLA_BASE_URL", "https://unify.kolla.dev/dental/v1")
-        self.headers = {
-            "accept": "application/json",
-            "authorization": f"Bearer {os.getenv('KOLLA_BEARER_TOKEN')}",
-            "connector-id": os.getenv("KOLLA_CONNECTOR_ID", "eaglesoft"),
-            "consumer-id": os.getenv("KOLLA_CONSUMER_ID", "dajc")
-        }
+        # Kolla API configuration shared via config.py
+        self.base_url = KOLLA_BASE_URL
+        self.headers = dict(KOLLA_HEADERS)
+        # Pooled keep-alive session so repeated lookups skip the TCP/TLS handshake
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
     
     def normalize_phone_number(self, phone_number: str) -> str:
         """Normalize phone number by removing spaces, dashes, parentheses"""
@@ -78,6 +82,18 @@ class DOBVerificationService:
         logger.warning(f"Could not parse date format: {date_str}")
         return None
     
+    def _fetch_first_contact(self, contacts_url: str, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Fetch the phone-filtered contacts and decode only the first record"""
+        with self.session.get(contacts_url, params=params, timeout=10, stream=True) as response:
+            if response.status_code != 200:
+                logger.error(f"❌ Kolla API error: {response.status_code} - {response.text}")
+                return None
+            response.raw.decode_content = True
+            contact = next(ijson.items(response.raw, "contacts.item", use_float=True), None)
+            # Drain the rest of the body undecoded so the connection goes back to the session pool
+            response.raw.read()
+            return contact
+    
     async def get_contact_by_phone(self, phone_number: str) -> Optional[Dict[str, Any]]:
         """Get contact information from Kolla API using phone number"""
         try:
@@ -89,17 +105,9 @@ class DOBVerificationService:
             
             logger.info(f"📞 Fetching contact for phone: {normalized_phone}")
             
-            response = requests.get(contacts_url, headers=self.headers, params=params, timeout=10)
-            
-            if response.status_code != 200:
-                logger.error(f"❌ Kolla API error: {response.status_code} - {response.text}")
-                return None
-            
-            contacts_data = response.json()
-            contacts = contacts_data.get("contacts", [])
+            contact = await asyncio.to_thread(self._fetch_first_contact, contacts_url, params)
             
-            if contacts:
-                contact = contacts[0]  # Return first matching contact
+            if contact:
                 logger.info(f"✅ Found contact: {contact.get('given_name', '')} {contact.get('family_name', '')}")
                 return contact
             else:
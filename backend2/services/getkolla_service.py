@@ -5,28 +5,19 @@ GetKolla PMS integration service for syncing patient data and appointments
 import json
 import logging
 import requests
-import os
 from typing import Dict, Any, List, Optional
 from services.service_status_sheet import update_kolla_integration, update_fastapi_backend
 from datetime import datetime, timedelta
 from pathlib import Path
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from config import KOLLA_BASE_URL, KOLLA_HEADERS
 
 logger = logging.getLogger(__name__)
 
 class GetKollaService:
     def __init__(self):
-        # Kolla API configuration from environment variables
-        self.base_url = os.getenv("KOLLA_BASE_URL", "https://unify.kolla.dev/dental/v1")
-        self.headers = {
-            "accept": "application/json",
-            "authorization": f"Bearer {os.getenv('KOLLA_BEARER_TOKEN')}",
-            "connector-id": os.getenv("KOLLA_CONNECTOR_ID", "eaglesoft"),
-            "consumer-id": os.getenv("KOLLA_CONSUMER_ID", "dajc")
-        }
+        # Kolla API configuration shared via config.py
+        self.base_url = KOLLA_BASE_URL
+        self.headers = dict(KOLLA_HEADERS)
           # Load schedule configuration
         self.schedule_file = Path(__file__).parent.parent.parent / "schedule.json"
         self.schedule = self._load_schedule()
@@ -0,0 +1,33 @@
+"""
+Multi-keyword scanner for FAQ routing
+Compiles a category -> keywords table into one regex so a query is scanned once for every keyword
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, Set, Tuple
+
+
+class KeywordScanner:
+    """Finds which categories have at least one keyword occurring in a text (plain substring match)"""
+
+    def __init__(self, category_keywords: Iterable[Tuple[str, Iterable[str]]]):
+        keyword_categories: Dict[str, Set[str]] = {}
+        for category, keywords in category_keywords:
+            for keyword in keywords:
+                keyword_categories.setdefault(keyword, set()).add(category)
+        # The scan reports only the longest keyword starting at each position, so a keyword
+        # also carries the categories of every shorter keyword that is a prefix of it
+        self._categories: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset().union(*(cats for prefix, cats in keyword_categories.items() if keyword.startswith(prefix)))
+            for keyword in keyword_categories
+        }
+        alternation = "|".join(re.escape(k) for k in sorted(self._categories, key=len, reverse=True))
+        # Zero-width lookahead so overlapping keywords are all reported in a single pass
+        self._pattern = re.compile(f"(?=({alternation}))")
+
+    def match(self, text: str) -> Set[str]:
+        """Return the set of categories with a keyword in text"""
+        matched: Set[str] = set()
+        for keyword in self._pattern.findall(text):
+            matched |= self._categories[keyword]
+        return matched
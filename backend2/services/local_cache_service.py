@@ -110,6 +110,23 @@ class LocalCacheService:
         last_updated = datetime.fromisoformat(result[0])
         return datetime.now() - last_updated > timedelta(hours=hours)
     
+    def last_refreshed(self) -> Optional[str]:
+        """Latest last_updated across appointments and schedules; changes whenever appointment lookups could"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT MAX(last_updated) FROM (
+                SELECT MAX(last_updated) AS last_updated FROM appointments
+                UNION ALL
+                SELECT MAX(last_updated) FROM schedules
+            )
+        ''')
+        
+        result = cursor.fetchone()
+        conn.close()
+        return result[0] if result else None
+    
     def store_schedule(self, date: str, data: Dict[str, Any]):
         """Store schedule data for a specific date"""
         conn = sqlite3.connect(self.db_path)
@@ -153,18 +170,16 @@ class LocalCacheService:
         
         # Try to get patient name from contact information
         contact = appointment_data.get("contact", {})
-        given_name = contact.get("given_name", "")
-        family_name = contact.get("family_name", "")
-        contact_name = contact.get("name", "")
-        
-        if contact_name:
-            patient_name = contact_name
-        elif given_name and family_name:
-            patient_name = f"{given_name} {family_name}"
-        elif given_name:
-            patient_name = given_name
-        else:
-            patient_name = ""
+        patient_name = contact.get("name", "")
+        
+        # Only fall back to building the name when the contact has no display name
+        if not patient_name:
+            given_name = contact.get("given_name", "")
+            family_name = contact.get("family_name", "")
+            if given_name and family_name:
+                patient_name = f"{given_name} {family_name}"
+            else:
+                patient_name = given_name or ""
             
         patient_dob = contact.get("birth_date", "")
         
@@ -387,3 +402,7 @@ class LocalCacheService:
                 appointments.append(json.loads(result[0]))
         
         return appointments
+
+
+# Global instance shared by the API modules and the interaction logger
+local_cache_service = LocalCacheService()
@@ -7,11 +7,34 @@ import os
 import random
 import logging
 import hashlib
+import hmac
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple
 import requests
 
 
+def normalize_phone_number(phone_number: str) -> str:
+    """Canonical +<digits> form used as the OTP storage key"""
+    # Already canonical (e.g. normalized by the API layer): nothing to redo
+    digits = phone_number[1:]
+    if phone_number[:1] == '+' and digits.isascii() and digits.isdigit() and len(digits) != 10:
+        return phone_number
+    
+    # Remove all non-numeric characters
+    normalized = ''.join(filter(str.isdigit, phone_number))
+    
+    # Add country code if not present (assuming US +1 for demo)
+    if len(normalized) == 10:
+        normalized = '1' + normalized
+    elif len(normalized) == 11 and normalized.startswith('1'):
+        pass  # Already has country code
+    elif len(normalized) > 11:
+        # International number, keep as is
+        pass
+    
+    return '+' + normalized
+
+
 class OTPService:
     """Service for managing SMS OTP functionality"""
     
@@ -20,6 +43,8 @@ class OTPService:
         self.otp_length = 6
         self.otp_expiry_minutes = 5
         self.max_attempts = 3
+        # Expired entries are dropped lazily when looked up; a full sweep only runs once storage grows past this
+        self.storage_sweep_threshold = 10000
         
         # SMS Provider configuration
         self.sms_provider = os.getenv('SMS_PROVIDER', 'twilio')  # 'twilio' or 'textlocal'
@@ -33,6 +58,10 @@ class OTPService:
         self.textlocal_api_key = os.getenv('TEXTLOCAL_API_KEY')
         self.textlocal_sender = os.getenv('TEXTLOCAL_SENDER', 'BrightSmile')
         
+        # Provider clients are reused across sends so each OTP skips the TCP+TLS handshake
+        self._twilio_client = None
+        self.session = requests.Session()
+        
         self.logger = logging.getLogger(__name__)
     
     def generate_otp(self) -> str:
@@ -40,24 +69,12 @@ class OTPService:
         return ''.join([str(random.randint(0, 9)) for _ in range(self.otp_length)])
     
     def _hash_phone_number(self, phone_number: str) -> str:
-        """Hash phone number for security"""
-        return hashlib.sha256(phone_number.encode()).hexdigest()
+        """Hash phone number for security (128-bit BLAKE2b: faster than SHA-256 on short inputs)"""
+        return hashlib.blake2b(phone_number.encode(), digest_size=16).hexdigest()
     
     def _normalize_phone_number(self, phone_number: str) -> str:
         """Normalize phone number format"""
-        # Remove all non-numeric characters
-        normalized = ''.join(filter(str.isdigit, phone_number))
-        
-        # Add country code if not present (assuming US +1 for demo)
-        if len(normalized) == 10:
-            normalized = '1' + normalized
-        elif len(normalized) == 11 and normalized.startswith('1'):
-            pass  # Already has country code
-        elif len(normalized) > 11:
-            # International number, keep as is
-            pass
-        
-        return '+' + normalized
+        return normalize_phone_number(phone_number)
     
     def send_otp_via_twilio(self, phone_number: str, otp: str) -> bool:
         """Send OTP via Twilio SMS"""
@@ -73,9 +90,10 @@ class OTPService:
                 self.logger.error("Twilio credentials not configured")
                 return False
             
-            client = Client(self.twilio_account_sid, self.twilio_auth_token)
+            if self._twilio_client is None:
+                self._twilio_client = Client(self.twilio_account_sid, self.twilio_auth_token)
             
-            message = client.messages.create(
+            message = self._twilio_client.messages.create(
                 body=f"Your BrightSmile verification code is: {otp}. This code expires in {self.otp_expiry_minutes} minutes.",
                 from_=self.twilio_phone_number,
                 to=phone_number
@@ -106,7 +124,7 @@ class OTPService:
                 'sender': self.textlocal_sender
             }
             
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             response_data = response.json()
             
             if response_data.get('status') == 'success':
@@ -137,10 +155,15 @@ class OTPService:
             phone_hash = self._hash_phone_number(normalized_phone)
             
             # Check rate limiting (optional)
-            if phone_hash in self.otp_storage:
-                last_sent = self.otp_storage[phone_hash].get('last_sent')
-                if last_sent and datetime.now() - last_sent < timedelta(minutes=1):
-                    return False, "Please wait before requesting another OTP", None
+            existing = self.otp_storage.get(phone_hash)
+            if existing:
+                if datetime.now() > existing['expires_at']:
+                    # Lazily evict; the new OTP below takes its slot
+                    del self.otp_storage[phone_hash]
+                else:
+                    last_sent = existing.get('last_sent')
+                    if last_sent and datetime.now() - last_sent < timedelta(minutes=1):
+                        return False, "Please wait before requesting another OTP", None
             
             # Generate OTP
             otp = self.generate_otp()
@@ -158,6 +181,9 @@ class OTPService:
                 sent_successfully = self.send_otp_mock(normalized_phone, otp)
             
             if sent_successfully:
+                if len(self.otp_storage) >= self.storage_sweep_threshold:
+                    self.cleanup_expired_otps()
+                
                 # Store OTP for verification
                 self.otp_storage[phone_hash] = {
                     'otp': otp,
@@ -187,11 +213,10 @@ class OTPService:
             normalized_phone = self._normalize_phone_number(phone_number)
             phone_hash = self._hash_phone_number(normalized_phone)
             
-            if phone_hash not in self.otp_storage:
+            otp_data = self.otp_storage.get(phone_hash)
+            if otp_data is None:
                 return False, "No OTP found for this phone number"
             
-            otp_data = self.otp_storage[phone_hash]
-            
             # Check if already verified
             if otp_data.get('verified'):
                 return False, "OTP already verified"
@@ -210,7 +235,8 @@ class OTPService:
             otp_data['attempts'] += 1
             
             # Verify OTP
-            if otp_data['otp'] == otp:
+            # Constant-time comparison so response timing does not leak matching digits
+            if hmac.compare_digest(otp_data['otp'].encode(), otp.encode()):
                 otp_data['verified'] = True
                 otp_data['verified_at'] = datetime.now()
                 self.logger.info(f"OTP verified successfully for {phone_number[-4:].rjust(len(phone_number), '*')}")
@@ -225,11 +251,10 @@ class OTPService:
     
     def cleanup_expired_otp(self, phone_hash: str):
         """Remove expired OTP from storage"""
-        if phone_hash in self.otp_storage:
-            del self.otp_storage[phone_hash]
+        self.otp_storage.pop(phone_hash, None)
     
     def cleanup_expired_otps(self):
-        """Clean up all expired OTPs"""
+        """Clean up all expired OTPs (expiry is otherwise enforced lazily on lookup)"""
         current_time = datetime.now()
         expired_hashes = [
             phone_hash for phone_hash, data in self.otp_storage.items()
@@ -248,10 +273,10 @@ class OTPService:
             normalized_phone = self._normalize_phone_number(phone_number)
             phone_hash = self._hash_phone_number(normalized_phone)
             
-            if phone_hash not in self.otp_storage:
+            otp_data = self.otp_storage.get(phone_hash)
+            if otp_data is None:
                 return None
             
-            otp_data = self.otp_storage[phone_hash]
             return {
                 'exists': True,
                 'verified': otp_data.get('verified', False),
@@ -4,15 +4,26 @@ Handles logging of all patient interactions with the AI assistant
 Stores data in JSON format and generates daily reports
 """
 import json
+import mmap
 import os
+import sys
 import uuid
-from datetime import datetime, date, timedelta
-from typing import Dict, List, Optional, Any, Literal
+from datetime import datetime, date, time, timedelta
+from typing import Dict, Iterator, List, Optional, Any, Literal, Tuple
 from pathlib import Path
 import base64
+import hashlib
+import threading
+from collections import Counter
+from functools import lru_cache
+
+import ijson
+import orjson
+import pytz
 
 # Import local cache service to fetch appointment details
-from .local_cache_service import LocalCacheService
+from .local_cache_service import local_cache_service
+from .smtp_pool import smtp_pool
 
 # Optional email imports - make email functionality optional
 try:
@@ -24,18 +35,81 @@ except ImportError:
     EMAIL_AVAILABLE = False
     print("⚠️ Email functionality not available. Reports will only be saved to files.")
 
+# Daily logs stay indented like the former json.dump(indent=2) output; non-str keys in details are stringified as before
+LOG_FILE_DUMP_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# Entry fields with few distinct values (they also key the statistics Counters)
+INTERNED_LOG_FIELDS = ("interaction_type", "date", "doctor", "service_type")
+
+# Top-level key written once per log entry (see log_interaction); never used inside details
+LOG_ENTRY_MARKER = b'"interaction_id":'
+
 InteractionType = Literal["booking", "rescheduling", "confirmation", "callback", "faq", "new_patient_form", "misc"]
 
+# Reports cover 8am (report timezone) on the previous day up to 8am on the report day
+REPORT_WINDOW_START = time(8, 0)
+
+# Lengths of datetime.isoformat() without an offset (seconds / microseconds); these order correctly as strings
+NAIVE_ISO_LENGTHS = (19, 26)
+
+# Rendered reports are cached, so the generation time is filled in per request rather than baked in
+REPORT_GENERATED_AT_PLACEHOLDER = "<!--report-generated-at-->"
+
+def _timestamp_hour(ts: Any) -> Optional[int]:
+    """Hour of an ISO timestamp, read from its HH field without building a datetime"""
+    if isinstance(ts, str) and len(ts) >= 13 and ts[10] == "T" and ts[11:13].isdigit():
+        hour = int(ts[11:13])
+        return hour if hour < 24 else None
+    try:
+        return datetime.fromisoformat(ts).hour
+    except (TypeError, ValueError):
+        return None
+
+@lru_cache(maxsize=8)
+def _report_timezone(name: str):
+    """pytz zone lookup, done once per configured name"""
+    return pytz.timezone(name)
+
+@lru_cache(maxsize=8)
+def _parse_send_time(value: str) -> Tuple[int, int]:
+    """Split a configured "HH:MM" send time into (hour, minute)"""
+    hour, minute = value.split(":")
+    return int(hour), int(minute)
+
+@lru_cache(maxsize=128)
+def _read_log_file(path: str, mtime_ns: int, size: int) -> Tuple[Dict[str, Any], ...]:
+    """Parse a daily log file; callers pass the file's stat so unchanged files are parsed once"""
+    with open(path, 'rb') as f:
+        entries = orjson.loads(f.read())
+    # orjson already reuses key strings; share the low-cardinality values too, since parsed days stay cached
+    for entry in entries:
+        for field in INTERNED_LOG_FIELDS:
+            value = entry.get(field)
+            if type(value) is str:
+                entry[field] = sys.intern(value)
+    return tuple(entries)
+
+def write_report(report_path: Path, html_report: str) -> int:
+    """Write an HTML report as UTF-8; returns the size in bytes"""
+    html_bytes = html_report.encode('utf-8')
+    # Buffered writes loop until every byte is written, unlike a single raw FileIO.write
+    with open(report_path, 'wb') as f:
+        f.write(html_bytes)
+    return len(html_bytes)
+
 class PatientInteractionLogger:
     """Service for logging patient interactions and generating daily reports"""
     
     def __init__(self, log_directory: str = "interaction_logs", config_file: str = "reporting_config.json"):
         self.log_directory = Path(log_directory)
         self.log_directory.mkdir(exist_ok=True)
+        self.report_cache_directory = self.log_directory / "report_cache"
+        self.report_cache_directory.mkdir(exist_ok=True)
         self.config_file = Path(config_file)
         self.config = self._load_config()
-        self.cache_service = LocalCacheService()  # Initialize cache service
+        self.cache_service = local_cache_service  # Shared cache service instance
         self.last_report_sent_date = None  # Track last report sent to prevent duplicates
+        self._write_lock = threading.Lock()  # Daily log writes are read-modify-write; callers may be on worker threads
         
     def _load_config(self) -> Dict[str, Any]:
         """Load reporting configuration from file"""
@@ -184,7 +258,8 @@ class PatientInteractionLogger:
         service_type: Optional[str] = None,
         doctor: Optional[str] = None,
         error_message: Optional[str] = None,
-        reason: Optional[str] = None
+        reason: Optional[str] = None,
+        timestamp: Optional[datetime] = None
     ) -> str:
         """
         Log a patient interaction
@@ -200,12 +275,13 @@ class PatientInteractionLogger:
             doctor: Doctor name (will be fetched from appointment if not provided)
             error_message: Error message if interaction failed
             reason: Reason for the interaction (e.g., notes from request)
+            timestamp: When the interaction happened (defaults to now; pass it when the write is deferred)
             
         Returns:
             Unique interaction ID
         """
         interaction_id = str(uuid.uuid4())
-        timestamp = datetime.now()
+        timestamp = timestamp or datetime.now()
         
         # If patient details are missing but appointment_id is provided, fetch them
         if appointment_id and (not patient_name or not contact_number or not service_type or not doctor):
@@ -252,13 +328,17 @@ class PatientInteractionLogger:
     def _save_to_daily_log(self, log_entry: Dict[str, Any], log_date: date):
         """Save log entry to daily log file"""
         log_file = self.log_directory / f"interactions_{log_date.strftime('%Y_%m_%d')}.json"
-        
+        with self._write_lock:
+            self._append_to_log_file(log_file, log_entry)
+    
+    def _append_to_log_file(self, log_file: Path, log_entry: Dict[str, Any]):
+        """Append an entry to a JSON log file (caller holds _write_lock)"""
         # Load existing logs or create new list
         logs = []
         if log_file.exists():
             try:
-                with open(log_file, 'r') as f:
-                    logs = json.load(f)
+                with open(log_file, 'rb') as f:
+                    logs = orjson.loads(f.read())
             except Exception as e:
                 print(f"Error reading log file {log_file}: {e}")
                 logs = []
@@ -267,8 +347,8 @@ class PatientInteractionLogger:
         
         # Save updated logs
         try:
-            with open(log_file, 'w') as f:
-                json.dump(logs, f, indent=2)
+            with open(log_file, 'wb') as f:
+                f.write(orjson.dumps(logs, option=LOG_FILE_DUMP_OPTIONS))
         except Exception as e:
             print(f"Error writing to log file {log_file}: {e}")
     
@@ -279,28 +359,67 @@ class PatientInteractionLogger:
             
         log_file = self.log_directory / f"interactions_{target_date.strftime('%Y_%m_%d')}.json"
         
-        if not log_file.exists():
+        try:
+            stat = log_file.stat()
+        except FileNotFoundError:
             return []
         
         try:
-            with open(log_file, 'r') as f:
-                return json.load(f)
+            # Keyed on mtime and size, so any append to the file is a cache miss.
+            # Entries are copied so callers annotating them cannot corrupt the cached parse
+            return [dict(entry) for entry in _read_log_file(str(log_file), stat.st_mtime_ns, stat.st_size)]
         except Exception as e:
             print(f"Error reading daily interactions for {target_date}: {e}")
             return []
     
+    def count_log_entries(self, log_file: Path) -> int:
+        """Count entries in a daily log file by scanning for a per-entry key instead of parsing the JSON"""
+        with open(log_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                count = 0
+                pos = m.find(LOG_ENTRY_MARKER)
+                while pos != -1:
+                    count += 1
+                    pos = m.find(LOG_ENTRY_MARKER, pos + len(LOG_ENTRY_MARKER))
+                return count
+    
+    def iter_daily_interactions(self, target_date: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+        """Yield interactions for a date one at a time without loading the whole log"""
+        if target_date is None:
+            target_date = date.today()
+            
+        log_file = self.log_directory / f"interactions_{target_date.strftime('%Y_%m_%d')}.json"
+        
+        if not log_file.exists():
+            return
+        
+        with open(log_file, 'rb') as f:
+            try:
+                yield from ijson.items(f, "item", use_float=True)
+            except ijson.JSONError as e:
+                print(f"Error streaming daily interactions for {target_date}: {e}")
+    
     def generate_daily_report(self, target_date: Optional[date] = None) -> str:
         """Generate HTML daily report for previous day 8am US/Eastern to current day 8am US/Eastern (DST-aware)"""
-        import pytz
         if target_date is None:
             target_date = date.today()
 
-        tz = pytz.timezone(self.config["reporting"].get("timezone", "US/Eastern"))
+        tz = self.report_timezone()
 
         # Calculate window: prev day 8am to current day 8am (US/Eastern)
         prev_day = target_date - timedelta(days=1)
-        window_start_local = tz.localize(datetime.combine(prev_day, datetime.min.time()) + timedelta(hours=8))
-        window_end_local = tz.localize(datetime.combine(target_date, datetime.min.time()) + timedelta(hours=8))
+
+        # Reuse a previously rendered report while none of its inputs have changed
+        cache_file = self._report_cache_file(target_date, prev_day)
+        try:
+            return self._stamp_generated_at(cache_file.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            pass
+
+        window_start_local = tz.localize(datetime.combine(prev_day, REPORT_WINDOW_START))
+        window_end_local = tz.localize(datetime.combine(target_date, REPORT_WINDOW_START))
         window_start_utc = window_start_local.astimezone(pytz.utc)
         window_end_utc = window_end_local.astimezone(pytz.utc)
 
@@ -309,12 +428,20 @@ class PatientInteractionLogger:
         interactions_today = self.get_daily_interactions(target_date)
         all_interactions = interactions_prev + interactions_today
 
+        # Naive log timestamps are read as UTC; compare them as ISO strings against the window bounds
+        window_start_iso = window_start_utc.replace(tzinfo=None).isoformat()
+        window_end_iso = window_end_utc.replace(tzinfo=None).isoformat()
+
         # Filter by UTC timestamp in window
         filtered_interactions = []
         for interaction in all_interactions:
             ts = interaction.get("timestamp")
             if not ts:
                 continue
+            if len(ts) in NAIVE_ISO_LENGTHS:
+                if window_start_iso <= ts < window_end_iso:
+                    filtered_interactions.append(interaction)
+                continue
             try:
                 ts_dt = datetime.fromisoformat(ts)
                 ts_dt = ts_dt.replace(tzinfo=pytz.utc) if ts_dt.tzinfo is None else ts_dt.astimezone(pytz.utc)
@@ -329,56 +456,91 @@ class PatientInteractionLogger:
 
         # Generate HTML report
         html_report = self._generate_html_report(target_date, stats, categorized_interactions)
+        self._store_cached_report(target_date, cache_file, html_report)
+
+        return self._stamp_generated_at(html_report)
 
-        return html_report
+    def _stamp_generated_at(self, html_report: str) -> str:
+        """Fill in the generation time of a (possibly cached) rendered report"""
+        return html_report.replace(
+            REPORT_GENERATED_AT_PLACEHOLDER, datetime.now().strftime("%B %d, %Y at %I:%M %p"), 1
+        )
+    
+    def _report_cache_file(self, target_date: date, prev_day: date) -> Path:
+        """Cache path for a report, keyed on every file, setting and cache the report is built from"""
+        key_parts = [
+            target_date.isoformat(),
+            self.config["reporting"].get("timezone", "US/Eastern"),
+            str(self.config["reporting"].get("include_patient_details"))
+        ]
+        # Patient details are resolved through the local appointment cache, so a refresh there invalidates too
+        try:
+            key_parts.append(str(self.cache_service.last_refreshed()))
+        except Exception:
+            key_parts.append(uuid.uuid4().hex)  # Unknown cache state: never reuse
+        for source in (
+            self.log_directory / f"interactions_{prev_day.strftime('%Y_%m_%d')}.json",
+            self.log_directory / f"interactions_{target_date.strftime('%Y_%m_%d')}.json",
+            self.log_directory.parent / "callback_requests.json"
+        ):
+            try:
+                stat = source.stat()
+                key_parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+            except FileNotFoundError:
+                key_parts.append("-")
+        key = hashlib.blake2b("|".join(key_parts).encode(), digest_size=16).hexdigest()
+        return self.report_cache_directory / f"report_{target_date.strftime('%Y_%m_%d')}_{key}.html"
+    
+    def _store_cached_report(self, target_date: date, cache_file: Path, html_report: str):
+        """Save a rendered report and drop older cached versions for the same date"""
+        try:
+            for stale in self.report_cache_directory.glob(f"report_{target_date.strftime('%Y_%m_%d')}_*.html"):
+                stale.unlink(missing_ok=True)
+            # Write then rename, so other workers never read a partial report
+            tmp_file = cache_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            write_report(tmp_file, html_report)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"Error caching report for {target_date}: {e}")
     
     def _calculate_statistics(self, interactions: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculate statistics from interactions"""
         total_calls = len(interactions)
-        successful_calls = sum(1 for i in interactions if i.get('success', False))
-        success_rate = (successful_calls / total_calls * 100) if total_calls > 0 else 0
-        
-        # Count new bookings (successful booking interactions)
-        new_bookings = sum(1 for i in interactions 
-                          if i.get('interaction_type') == 'booking' and i.get('success', False))
-        
-        # Count successful reschedulings
-        reschedulings = sum(1 for i in interactions 
-                          if i.get('interaction_type') == 'rescheduling' and i.get('success', False))
-        
-        # Count successful confirmations
-        confirmations = sum(1 for i in interactions 
-                          if i.get('interaction_type') == 'confirmation' and i.get('success', False))
-        
-        # Calculate minimum estimated revenue (bookings + reschedulings + confirmations) * $110
-        min_est_revenue = (new_bookings + reschedulings + confirmations) * 110
         
-        # Count by interaction type
-        type_counts = {}
-        successful_by_type = {}
+        # One pass: count by interaction type, successes by type, and calls per hour of day
+        type_counts = Counter()
+        successful_by_type = Counter()
+        hourly_counts = Counter()
         
         for interaction in interactions:
             interaction_type = interaction.get('interaction_type', 'misc')
-            type_counts[interaction_type] = type_counts.get(interaction_type, 0) + 1
+            type_counts[interaction_type] += 1
             
             if interaction.get('success', False):
-                successful_by_type[interaction_type] = successful_by_type.get(interaction_type, 0) + 1
+                successful_by_type[interaction_type] += 1
+            
+            hour = _timestamp_hour(interaction.get('timestamp'))
+            if hour is not None:
+                hourly_counts[hour] += 1
+        
+        successful_calls = sum(successful_by_type.values())
+        success_rate = (successful_calls / total_calls * 100) if total_calls > 0 else 0
+        
+        # Count new bookings, successful reschedulings and successful confirmations
+        new_bookings = successful_by_type['booking']
+        reschedulings = successful_by_type['rescheduling']
+        confirmations = successful_by_type['confirmation']
+        
+        # Calculate minimum estimated revenue (bookings + reschedulings + confirmations) * $110
+        min_est_revenue = (new_bookings + reschedulings + confirmations) * 110
         
         # Calculate success rates by type
         type_success_rates = {}
         for interaction_type, count in type_counts.items():
-            successful = successful_by_type.get(interaction_type, 0)
+            successful = successful_by_type[interaction_type]
             type_success_rates[interaction_type] = (successful / count * 100) if count > 0 else 0
         
-        # Get peak hours
-        hourly_counts = {}
-        for interaction in interactions:
-            try:
-                hour = datetime.fromisoformat(interaction['timestamp']).hour
-                hourly_counts[hour] = hourly_counts.get(hour, 0) + 1
-            except:
-                continue
-        
+        # Get peak hours (ties go to the hour seen first, as before)
         peak_hour = max(hourly_counts.items(), key=lambda x: x[1]) if hourly_counts else (0, 0)
         
         return {
@@ -388,7 +550,7 @@ class PatientInteractionLogger:
             "success_rate": round(success_rate, 2),
             "new_bookings": new_bookings,
             "min_est_revenue": min_est_revenue,
-            "type_counts": type_counts,
+            "type_counts": dict(type_counts),
             "type_success_rates": {k: round(v, 2) for k, v in type_success_rates.items()},
             "peak_hour": peak_hour[0] if peak_hour[1] > 0 else None,
             "peak_hour_count": peak_hour[1] if peak_hour[1] > 0 else 0
@@ -423,8 +585,8 @@ class PatientInteractionLogger:
             if not callbacks_file.exists():
                 return []
             
-            with open(callbacks_file, 'r') as f:
-                all_callbacks = json.load(f)
+            with open(callbacks_file, 'rb') as f:
+                all_callbacks = orjson.loads(f.read())
             
             # Filter callbacks for the specific date
             date_callbacks = []
@@ -823,7 +985,7 @@ class PatientInteractionLogger:
         
         <div class="footer">
             <p>Report generated automatically by Zenfru AI Assistant. All Rights Reserved</p>
-            <p>Generated on """ + datetime.now().strftime("%B %d, %Y at %I:%M %p") + """</p>
+            <p>Generated on """ + REPORT_GENERATED_AT_PLACEHOLDER + """</p>
         </div>
     </div>
 </body>
@@ -835,11 +997,8 @@ class PatientInteractionLogger:
     def _generate_and_send_daily_report(self):
         """Generate and send daily report via email (timezone-aware)"""
         try:
-            import pytz
-            
             # Get timezone from config, default to Eastern
-            timezone_str = self.config["reporting"].get("timezone", "US/Eastern")
-            tz = pytz.timezone(timezone_str)
+            tz = self.report_timezone()
             
             # Use timezone-aware date calculation
             now = datetime.now(tz)
@@ -849,8 +1008,7 @@ class PatientInteractionLogger:
             
             # Save report to file
             report_file = self.log_directory / f"daily_report_{yesterday.strftime('%Y_%m_%d')}.html"
-            with open(report_file, 'w', encoding='utf-8') as f:
-                f.write(html_report)
+            write_report(report_file, html_report)
             
             # Send email if configured and available
             if EMAIL_AVAILABLE and self.config["email"]["recipients"] and self.config["email"]["username"]:
@@ -880,12 +1038,8 @@ class PatientInteractionLogger:
             html_part = MIMEText(html_report, 'html')
             msg.attach(html_part)
             
-            # Send email
-            with smtplib.SMTP(self.config["email"]["smtp_server"], self.config["email"]["smtp_port"]) as server:
-                if self.config["email"]["use_tls"]:
-                    server.starttls()
-                server.login(self.config["email"]["username"], self.config["email"]["password"])
-                server.send_message(msg)
+            # Send email over a pooled, already-authenticated connection
+            smtp_pool.send_message(self.config["email"], msg)
             
             print(f"📧 Daily report sent successfully to {len(self.config['email']['recipients'])} recipients")
             
@@ -909,15 +1063,19 @@ class PatientInteractionLogger:
             msg['From'] = self.config["email"]["username"]
             msg['To'] = self.config["fallback"]["backup_email"]
             
-            with smtplib.SMTP(self.config["email"]["smtp_server"], self.config["email"]["smtp_port"]) as server:
-                if self.config["email"]["use_tls"]:
-                    server.starttls()
-                server.login(self.config["email"]["username"], self.config["email"]["password"])
-                server.send_message(msg)
+            smtp_pool.send_message(self.config["email"], msg)
                 
         except Exception as e:
             print(f"❌ Error sending fallback notification: {e}")
     
+    def report_timezone(self):
+        """Configured report timezone (defaults to US/Eastern)"""
+        return _report_timezone(self.config["reporting"].get("timezone", "US/Eastern"))
+    
+    def daily_send_time(self) -> Tuple[int, int]:
+        """Configured daily report send time as (hour, minute)"""
+        return _parse_send_time(self.config["reporting"].get("daily_email_time", "08:00"))
+    
     def update_config(self, new_config: Dict[str, Any]):
         """Update configuration settings with deep merge"""
         def deep_merge(target, source):
@@ -0,0 +1,30 @@
+"""
+In-process per-key rate limiting
+Token buckets keyed by caller identity (e.g. phone number); single-process only
+"""
+
+import time
+from typing import Hashable
+
+from .ttl_cache import TTLCache
+
+
+class TokenBucketLimiter:
+    """Allows up to ``times`` requests per ``seconds`` for each key, refilling continuously"""
+
+    def __init__(self, times: int, seconds: float, maxsize: int = 10000):
+        self.capacity = float(times)
+        self.refill_rate = times / seconds
+        # A bucket left idle for `seconds` is full again, so expiring it loses nothing
+        self._buckets = TTLCache(maxsize=maxsize, ttl=seconds)
+
+    def allow(self, key: Hashable) -> bool:
+        """Take a token for key; False when the key is over its limit"""
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - last) * self.refill_rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets.set(key, (tokens, now))
+        return allowed
@@ -0,0 +1,78 @@
+"""
+Shared store for runtime callback and conversation records
+Backed by a SQLite file so every worker process on the host reads and writes the same records
+"""
+
+import asyncio
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+class RecordStore:
+    """Bounded record log for one kind of record (e.g. callbacks); keeps and returns the most recent entries"""
+
+    def __init__(self, kind: str, db_path: str = "runtime_records.db", max_records: int = 1000):
+        self.kind = kind
+        # Relative paths resolve against backend2/, not the working directory
+        self.db_path = Path(__file__).parent.parent / db_path
+        self.max_records = max_records
+        self.init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        # timeout lets concurrent workers wait for the write lock instead of failing
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def init_database(self):
+        """Create the shared records table if needed"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS runtime_records (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    record_id TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_runtime_records_kind ON runtime_records (kind, id)")
+
+    def _insert(self, record_id: str, record: Dict[str, Any]):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO runtime_records (kind, record_id, data) VALUES (?, ?, ?)",
+                (self.kind, record_id, json.dumps(record))
+            )
+            # Drop everything older than the newest max_records of this kind, in the same transaction
+            conn.execute(
+                '''
+                DELETE FROM runtime_records WHERE kind = ? AND id <= (
+                    SELECT id FROM runtime_records WHERE kind = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+                )
+                ''',
+                (self.kind, self.kind, self.max_records)
+            )
+
+    def _select_recent(self) -> List[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT data FROM runtime_records WHERE kind = ? ORDER BY id DESC LIMIT ?",
+                (self.kind, self.max_records)
+            ).fetchall()
+        return [json.loads(data) for (data,) in reversed(rows)]
+
+    async def append(self, record_id: str, record: Dict[str, Any]):
+        """Store a record without blocking the event loop"""
+        await asyncio.to_thread(self._insert, record_id, record)
+
+    async def recent(self) -> List[Dict[str, Any]]:
+        """Return up to max_records most recent records, oldest first"""
+        return await asyncio.to_thread(self._select_recent)
+
+
+# Global instances
+callback_store = RecordStore("callback")
+conversation_store = RecordStore("conversation")
@@ -0,0 +1,108 @@
+"""
+Pool of logged-in SMTP connections
+Report emails reuse an authenticated session instead of paying connect + STARTTLS + login per send
+"""
+
+import queue
+import smtplib
+import threading
+from email.message import Message
+from typing import Any, Dict, Tuple
+
+SMTP_TIMEOUT_SECONDS = 30
+
+# Connections are only reused against the same server and credentials
+SettingsKey = Tuple[str, int, str, str, bool]
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of SMTP connections already in starttls/login state"""
+
+    def __init__(self, maxsize: int = 5):
+        self._idle: "queue.LifoQueue[Tuple[SettingsKey, smtplib.SMTP]]" = queue.LifoQueue(maxsize)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _settings_key(settings: Dict[str, Any]) -> SettingsKey:
+        return (settings["smtp_server"], int(settings["smtp_port"]), settings["username"],
+                settings["password"], bool(settings.get("use_tls", True)))
+
+    @staticmethod
+    def _connect(key: SettingsKey) -> smtplib.SMTP:
+        server_name, port, username, password, use_tls = key
+        server = smtplib.SMTP(server_name, port, timeout=SMTP_TIMEOUT_SECONDS)
+        try:
+            if use_tls:
+                server.starttls()
+            server.login(username, password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    @staticmethod
+    def _discard(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _acquire(self, key: SettingsKey) -> Tuple[smtplib.SMTP, bool]:
+        """Return (connection, reused); idle connections are NOOP-checked before reuse"""
+        while True:
+            try:
+                idle_key, server = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect(key), False
+            if idle_key != key:
+                self._discard(server)
+                continue
+            try:
+                if server.noop()[0] == 250:
+                    return server, True
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._discard(server)
+
+    def _release(self, key: SettingsKey, server: smtplib.SMTP):
+        try:
+            self._idle.put_nowait((key, server))
+        except queue.Full:
+            self._discard(server)
+
+    def send_message(self, settings: Dict[str, Any], msg: Message):
+        """Send a message with the given email settings, reconnecting once if a pooled session dropped"""
+        key = self._settings_key(settings)
+        with self._lock:
+            server, reused = self._acquire(key)
+        try:
+            server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            server.close()
+            if not reused:
+                raise
+            server = self._connect(key)
+            try:
+                server.send_message(msg)
+            except Exception:
+                self._discard(server)
+                raise
+        except Exception:
+            self._discard(server)
+            raise
+        with self._lock:
+            self._release(key, server)
+
+    def close(self):
+        """Log out of every idle connection"""
+        with self._lock:
+            while True:
+                try:
+                    _, server = self._idle.get_nowait()
+                except queue.Empty:
+                    return
+                self._discard(server)
+
+
+# Global instance
+smtp_pool = SMTPConnectionPool()
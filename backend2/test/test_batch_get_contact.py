@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test script for the batch get_contact endpoint
+"""
+
+import sys
+sys.path.append('.')
+
+import asyncio
+from api import get_contact_api
+from api.models import BatchGetContactRequest
+
+def test_batch_requires_matching_caller_and_keeps_order():
+    verified = []
+    fetched = []
+
+    async def fake_verify_dob(phone, dob):
+        verified.append((phone, dob))
+        return dob == "1990-01-01", "ok" if dob == "1990-01-01" else "DOB mismatch", None
+
+    async def fake_fetch(phone, client):
+        fetched.append(phone)
+        return [{"name": f"contacts/{phone}"}]
+
+    original_verify = get_contact_api.dob_verification_service.verify_dob
+    original_fetch = get_contact_api.fetch_contacts_by_phone_filter
+    get_contact_api.dob_verification_service.verify_dob = fake_verify_dob
+    get_contact_api.fetch_contacts_by_phone_filter = fake_fetch
+    try:
+        request = BatchGetContactRequest(caller="+1 (555) 123-4567", patients=[
+            {"phone": "+15551234567", "dob": "1990-01-01"},
+            {"phone": "15551234567", "dob": "1980-02-02"},
+            {"phone": "5559999999", "dob": "1990-01-01"},
+            {"phone": "1555-123-4567", "dob": "1990-01-01"},
+        ])
+        response = asyncio.run(get_contact_api.get_contacts_batch(request, True, None))
+    finally:
+        get_contact_api.dob_verification_service.verify_dob = original_verify
+        get_contact_api.fetch_contacts_by_phone_filter = original_fetch
+
+    results = response["results"]
+    assert response["total_requested"] == len(results) == 4
+    assert [result["phone"] for result in results] == ["+15551234567", "15551234567", "5559999999", "1555-123-4567"]
+    assert [result["dob_verified"] for result in results] == [True, False, False, True]
+    assert results[2]["message"] == "Caller number does not match provided phone"
+    assert results[0]["contacts"] == results[3]["contacts"] == [{"name": "contacts/15551234567"}]
+    assert response["total_found"] == 2
+
+    # Formatting variants share one lookup; the non-matching number is never looked up
+    assert sorted(verified) == [("15551234567", "1980-02-02"), ("15551234567", "1990-01-01")]
+    assert fetched == ["15551234567"]
+    print("✅ Batch lookups match the caller, dedupe normalized phones and keep request order")
+
+if __name__ == "__main__":
+    test_batch_requires_matching_caller_and_keeps_order()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test script for the FAQ keyword scanner
+"""
+
+import sys
+sys.path.append('.')
+
+import random
+from services.keyword_scanner import KeywordScanner
+from api.faq_api import FAQ_KEYWORDS
+
+def _substring_categories(text, category_keywords):
+    """The any(word in query) matching the scanner replaced"""
+    return {category for category, keywords in category_keywords if any(k in text for k in keywords)}
+
+def test_keyword_scanner_matches_substring_routing():
+    scanner = KeywordScanner(FAQ_KEYWORDS)
+
+    # Overlapping and prefix keywords are all reported ("parking" contains "park", "first time" contains "time")
+    assert scanner.match("is there parking?") == {"parking_info"}
+    assert scanner.match("my first time here") == {"new_patient_info", "office_hours"}
+    assert scanner.match("nothing relevant") == set()
+
+    # Same categories as plain substring matching on randomized queries
+    rng = random.Random(1234)
+    vocabulary = [k for _, keywords in FAQ_KEYWORDS for k in keywords] + ["a", "the", "xyz", "tooth", "par", "ours"]
+    for _ in range(2000):
+        text = "".join(rng.choice(vocabulary) + rng.choice(["", " ", "-"]) for _ in range(rng.randint(0, 6)))
+        assert scanner.match(text) == _substring_categories(text, FAQ_KEYWORDS), text
+    print("✅ Keyword scanner matches substring routing")
+
+def test_keyword_scanner_shared_prefixes():
+    table = (("short", ("ab",)), ("long", ("abc",)), ("other", ("bc",)))
+    scanner = KeywordScanner(table)
+    for text in ("ab", "abc", "xabcx", "bc", "abab", ""):
+        assert scanner.match(text) == _substring_categories(text, table), text
+    print("✅ Keyword scanner reports keywords that share a prefix")
+
+if __name__ == "__main__":
+    test_keyword_scanner_matches_substring_routing()
+    test_keyword_scanner_shared_prefixes()
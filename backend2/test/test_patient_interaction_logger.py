@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for reading and counting daily interaction logs
+"""
+
+import sys
+sys.path.append('.')
+
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+from unittest import mock
+from services import patient_interaction_logger as logger_module
+from services.patient_interaction_logger import PatientInteractionLogger, REPORT_GENERATED_AT_PLACEHOLDER
+
+def _make_logger(tmp_dir: str) -> PatientInteractionLogger:
+    return PatientInteractionLogger(
+        log_directory=str(Path(tmp_dir) / "logs"),
+        config_file=str(Path(tmp_dir) / "reporting_config.json")
+    )
+
+def test_cached_entries_are_not_shared():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        logger = _make_logger(tmp_dir)
+        when = datetime(2026, 1, 5, 9, 30)
+        logger.log_interaction("booking", patient_name="Jane Doe", contact_number="5551234567", timestamp=when)
+
+        first = logger.get_daily_interactions(when.date())
+        assert first[0]["patient_name"] == "Jane Doe"
+
+        # Annotating a returned entry must not leak into the next (cached) read
+        first[0]["patient_name"] = "Changed"
+        first[0]["enriched"] = True
+        second = logger.get_daily_interactions(when.date())
+        assert second[0]["patient_name"] == "Jane Doe"
+        assert "enriched" not in second[0]
+    print("✅ Cached daily log entries are copied per read")
+
+def test_count_log_entries():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        logger = _make_logger(tmp_dir)
+        log_file = Path(tmp_dir) / "entries.json"
+
+        # Empty files cannot be mmapped, so they are counted without one
+        log_file.write_bytes(b"")
+        assert logger.count_log_entries(log_file) == 0
+
+        log_file.write_bytes(b"[]")
+        assert logger.count_log_entries(log_file) == 0
+
+        when = datetime(2026, 1, 5, 9, 30)
+        for i in range(3):
+            logger.log_interaction("booking", patient_name=f"Patient {i}", contact_number="5551234567", timestamp=when)
+        daily_log = logger.log_directory / "interactions_2026_01_05.json"
+        assert logger.count_log_entries(daily_log) == 3
+    print("✅ count_log_entries counts entries via mmap")
+
+def test_iter_daily_interactions():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        logger = _make_logger(tmp_dir)
+        when = datetime(2026, 1, 5, 9, 30)
+
+        # Missing day yields nothing
+        assert list(logger.iter_daily_interactions(when.date())) == []
+
+        for name in ("A", "B"):
+            logger.log_interaction("rescheduling", patient_name=name, contact_number="5551234567", timestamp=when)
+        streamed = list(logger.iter_daily_interactions(when.date()))
+        assert [entry["patient_name"] for entry in streamed] == ["A", "B"]
+        assert streamed == logger.get_daily_interactions(when.date())
+
+        # A truncated file yields the complete entries before the damage instead of raising
+        daily_log = logger.log_directory / "interactions_2026_01_05.json"
+        data = daily_log.read_bytes()
+        daily_log.write_bytes(data[:data.rindex(b"{")])
+        assert [entry["patient_name"] for entry in logger.iter_daily_interactions(date(2026, 1, 5))] == ["A"]
+    print("✅ iter_daily_interactions streams entries one at a time")
+
+def test_cached_report_is_stamped_per_request():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        logger = _make_logger(tmp_dir)
+        report_day = date(2026, 1, 6)
+        logger.log_interaction("booking", patient_name="Jane Doe", contact_number="5551234567",
+                               timestamp=datetime(2026, 1, 5, 15, 0))
+
+        first_now = datetime(2026, 1, 6, 8, 5)
+        second_now = datetime(2026, 1, 6, 17, 45)
+        with mock.patch.object(logger_module, "datetime", wraps=datetime) as fake_datetime:
+            fake_datetime.now.return_value = first_now
+            first = logger.generate_daily_report(report_day)
+            fake_datetime.now.return_value = second_now
+            second = logger.generate_daily_report(report_day)
+
+        # The cached body holds the placeholder; each response carries its own generation time
+        cached = list(logger.report_cache_directory.glob("report_2026_01_06_*.html"))
+        assert len(cached) == 1 and REPORT_GENERATED_AT_PLACEHOLDER in cached[0].read_text(encoding="utf-8")
+        assert REPORT_GENERATED_AT_PLACEHOLDER not in first and REPORT_GENERATED_AT_PLACEHOLDER not in second
+        assert "January 06, 2026 at 08:05 AM" in first
+        assert "January 06, 2026 at 05:45 PM" in second
+        assert first.replace("08:05 AM", "05:45 PM") == second
+    print("✅ Cached reports are stamped with the current generation time")
+
+if __name__ == "__main__":
+    test_cached_entries_are_not_shared()
+    test_count_log_entries()
+    test_iter_daily_interactions()
+    test_cached_report_is_stamped_per_request()
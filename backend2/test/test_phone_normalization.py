@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Test script for OTP phone number normalization
+"""
+
+import sys
+sys.path.append('.')
+
+from services.otp_service import normalize_phone_number
+
+def _normalize_slow(phone_number):
+    """Normalization without the already-canonical fast path"""
+    normalized = ''.join(filter(str.isdigit, phone_number))
+    if len(normalized) == 10:
+        normalized = '1' + normalized
+    return '+' + normalized
+
+def test_normalize_phone_number():
+    cases = [
+        "+15551234567",      # canonical: fast path
+        "+445551234567",     # canonical international
+        "+5551234567",       # + with 10 digits still gets the US country code
+        "5551234567",
+        "(555) 123-4567",
+        "1-555-123-4567",
+        "+1 (555) 123-4567",
+        "+１５５５１２３４５６７",  # full-width digits are not ASCII, so they skip the fast path
+        "+",
+        "",
+    ]
+    for phone in cases:
+        assert normalize_phone_number(phone) == _normalize_slow(phone), phone
+    assert normalize_phone_number("(555) 123-4567") == "+15551234567"
+    print("✅ normalize_phone_number fast path matches full normalization")
+
+if __name__ == "__main__":
+    test_normalize_phone_number()
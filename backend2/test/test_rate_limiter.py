@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process token bucket rate limiter
+"""
+
+import sys
+sys.path.append('.')
+
+import time
+from services.rate_limiter import TokenBucketLimiter
+
+def test_token_bucket_limiter():
+    limiter = TokenBucketLimiter(times=3, seconds=0.2)
+
+    # A fresh key gets the full burst, then is refused
+    assert [limiter.allow("+15551234567") for _ in range(4)] == [True, True, True, False]
+
+    # Keys are limited independently
+    assert limiter.allow("+15550000000")
+
+    # Tokens refill continuously: one token takes seconds / times
+    time.sleep(0.08)
+    assert limiter.allow("+15551234567")
+    assert not limiter.allow("+15551234567")
+
+    # An idle bucket refills to capacity, but never beyond it
+    time.sleep(0.45)
+    assert [limiter.allow("+15551234567") for _ in range(4)] == [True, True, True, False]
+    print("✅ Token bucket limiter allows bursts and refills over time")
+
+if __name__ == "__main__":
+    test_token_bucket_limiter()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared SQLite record store
+"""
+
+import sys
+sys.path.append('.')
+
+import asyncio
+import tempfile
+from contextlib import closing
+from pathlib import Path
+from services.record_store import RecordStore
+
+def test_record_store_append_and_prune():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "records.db")
+        callbacks = RecordStore("callback", db_path=db_path, max_records=3)
+        conversations = RecordStore("conversation", db_path=db_path, max_records=3)
+
+        async def run():
+            for i in range(5):
+                await callbacks.append(f"cb-{i}", {"n": i})
+            await conversations.append("conv-0", {"n": 0})
+            return await callbacks.recent(), await conversations.recent()
+
+        recent_callbacks, recent_conversations = asyncio.run(run())
+
+        # Only the newest max_records are kept, oldest first, and kinds do not evict each other
+        assert [r["n"] for r in recent_callbacks] == [2, 3, 4]
+        assert recent_conversations == [{"n": 0}]
+        with closing(callbacks._connect()) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM runtime_records WHERE kind = 'callback'").fetchone()[0] == 3
+    print("✅ Record store keeps only the most recent records per kind")
+
+if __name__ == "__main__":
+    test_record_store_append_and_prune()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test script for the pooled SMTP connections used by report emails
+"""
+
+import sys
+sys.path.append('.')
+
+import smtplib
+from email.message import EmailMessage
+from unittest import mock
+from services import smtp_pool as smtp_pool_module
+from services.smtp_pool import SMTPConnectionPool
+
+SETTINGS = {"smtp_server": "smtp.example.com", "smtp_port": 587, "username": "user", "password": "pass", "use_tls": True}
+
+class FakeSMTP:
+    """Stands in for smtplib.SMTP; records each connection made"""
+    instances = []
+
+    def __init__(self, host, port, timeout=None):
+        self.noop_code = 250
+        self.fail_next_send = False
+        self.sent = []
+        self.logins = 0
+        self.closed = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        self.logins += 1
+
+    def noop(self):
+        if self.noop_code is None:
+            raise smtplib.SMTPServerDisconnected("gone")
+        return (self.noop_code, b"OK")
+
+    def send_message(self, msg):
+        if self.fail_next_send:
+            self.fail_next_send = False
+            raise smtplib.SMTPServerDisconnected("dropped")
+        self.sent.append(msg)
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+class DroppingSMTP(FakeSMTP):
+    """Connection whose first send is dropped by the server"""
+
+    def __init__(self, host, port, timeout=None):
+        super().__init__(host, port, timeout)
+        self.fail_next_send = True
+
+def _message() -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = "Daily report"
+    msg.set_content("report")
+    return msg
+
+def test_smtp_pool_reuse_and_noop_check():
+    FakeSMTP.instances = []
+    pool = SMTPConnectionPool(maxsize=2)
+    with mock.patch.object(smtp_pool_module.smtplib, "SMTP", FakeSMTP):
+        # Second send reuses the logged-in connection after a passing NOOP
+        pool.send_message(SETTINGS, _message())
+        pool.send_message(SETTINGS, _message())
+        assert len(FakeSMTP.instances) == 1
+        first = FakeSMTP.instances[0]
+        assert first.logins == 1 and len(first.sent) == 2
+
+        # A failing NOOP discards the idle connection and opens a new one
+        first.noop_code = None
+        pool.send_message(SETTINGS, _message())
+        assert len(FakeSMTP.instances) == 2
+        assert first.closed and len(FakeSMTP.instances[1].sent) == 1
+
+        # A pooled session that drops mid-send is retried once on a fresh connection
+        FakeSMTP.instances[1].fail_next_send = True
+        pool.send_message(SETTINGS, _message())
+        assert len(FakeSMTP.instances) == 3 and len(FakeSMTP.instances[2].sent) == 1
+
+        # Connections are only reused for the same server and credentials
+        pool.send_message(dict(SETTINGS, username="other"), _message())
+        assert len(FakeSMTP.instances) == 4
+
+        pool.close()
+        assert all(server.closed for server in FakeSMTP.instances)
+    print("✅ SMTP pool reuses live connections and replaces dead ones")
+
+def test_smtp_pool_new_connection_disconnect_raises():
+    FakeSMTP.instances = []
+    pool = SMTPConnectionPool(maxsize=2)
+    with mock.patch.object(smtp_pool_module.smtplib, "SMTP", DroppingSMTP):
+        try:
+            pool.send_message(SETTINGS, _message())
+            raise AssertionError("expected SMTPServerDisconnected")
+        except smtplib.SMTPServerDisconnected:
+            pass
+        # A fresh connection is not retried, and nothing broken is returned to the pool
+        assert len(FakeSMTP.instances) == 1
+        assert pool._idle.empty()
+    print("✅ SMTP pool does not retry a fresh connection")
+
+if __name__ == "__main__":
+    test_smtp_pool_reuse_and_noop_check()
+    test_smtp_pool_new_connection_disconnect_raises()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process TTL cache
+"""
+
+import sys
+sys.path.append('.')
+
+import time
+from services.ttl_cache import TTLCache
+
+def test_ttl_cache():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    # "b" is least recently used, so it is evicted first
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    assert cache.pop("a") == 1
+    assert cache.get("a") is None
+
+    # Entries disappear once the TTL elapses
+    time.sleep(0.06)
+    assert cache.get("c") is None
+    assert len(cache) == 0
+    print("✅ TTL cache behaves as expected")
+
+if __name__ == "__main__":
+    test_ttl_cache()